@@ -27,12 +27,38 @@ class Config:
                 "default_model": "RealVisXL (SDXL)",
                 "default_steps": 25,
                 "default_width": 664,
-                "default_height": 1040
+                "default_height": 1040,
+                "batch_size": 4,
+                "preload": True,
+                "draft_scale": 0.5,
+                "draft_steps": 8,
+                "refine_strength": 0.5,
+                "pipeline_cache_size": 2,
+                "pipeline_memory_budget_mb": None,
+                "prompt_cache_size": 64,
+                "results_dir": "export/ai_results",
+                "results_max_mb": 2048,
+                "cpu": {
+                    "threads": None,
+                    "interop_threads": None,
+                    "channels_last": True,
+                    "bf16": "auto",
+                    "sdpa": True,
+                    "compile_unet": False
+                }
             },
             "renderer": {
                 "template_path": "resources/templates",
                 "output_path": "export",
-                "default_dpi": 300
+                "default_dpi": 300,
+                "pdf_image_format": "flate",
+                "pdf_jpeg_quality": 90,
+                "pdf_compress_level": 6,
+                "pdf_workers": None,
+                "pdf_bleed": 0,
+                "pdf_gutter": 0,
+                "pdf_crop_marks": False,
+                "pdf_duplex": "long"
             },
             "ui": {
                 "theme": "dark",
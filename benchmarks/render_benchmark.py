@@ -0,0 +1,243 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# Додаємо кореневу директорію проєкту до шляху пошуку модулів
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from app.config import config
+from benchmarks.synthetic_deck import generate_artwork, generate_deck
+from core.services.export_service import ExportService
+from core.services.renderer_service import RendererService
+from infrastructure.renderer.artwork_cache import ArtworkCache
+from infrastructure.renderer.card_renderer import CardRenderer
+from infrastructure.storage.pdf_exporter import PDFExporter
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class TimedIterator:
+    """Обгортка над послідовністю, що вимірює час обробки кожного елемента споживачем"""
+
+    def __init__(self, items: Iterable[Any]):
+        self.items = items
+        self.latencies: List[float] = []
+
+    def __iter__(self) -> Iterator[Any]:
+        last = None
+        for item in self.items:
+            now = time.perf_counter()
+            if last is not None:
+                self.latencies.append(now - last)
+            last = now
+            yield item
+
+        # Споживач запитує наступний елемент лише після обробки останнього
+        if last is not None:
+            self.latencies.append(time.perf_counter() - last)
+
+
+def peak_rss_mb() -> Dict[str, Optional[float]]:
+    """Повертає пікове RSS поточного процесу та дочірніх процесів у МБ"""
+    if resource is None:
+        return {"self": None, "children": None}
+
+    # Linux повертає кілобайти, macOS - байти
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / divisor, 1),
+    }
+
+
+def summarize(count: int, total: float, latencies: Optional[List[float]] = None) -> Dict[str, Any]:
+    """Формує метрики етапу: пропускна здатність, p50/p99 затримки, пікове RSS"""
+    result = {
+        "cards": count,
+        "total_s": round(total, 4),
+        "cards_per_sec": round(count / total, 2) if total > 0 else None,
+        "p50_ms": None,
+        "p99_ms": None,
+    }
+
+    if latencies:
+        ordered = sorted(latencies)
+        result["p50_ms"] = round(statistics.median(ordered) * 1000, 3)
+        result["p99_ms"] = round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000, 3)
+
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def bench_card_renderer(cards, renderer: CardRenderer) -> Dict[str, Any]:
+    latencies = []
+    start = time.perf_counter()
+    for card in cards:
+        t0 = time.perf_counter()
+        renderer.render(card)
+        latencies.append(time.perf_counter() - t0)
+    return summarize(len(cards), time.perf_counter() - start, latencies)
+
+
+def bench_render_cards(cards, service: RendererService) -> Dict[str, Any]:
+    timed = TimedIterator(cards)
+    start = time.perf_counter()
+    service.render_cards(timed, force=True)
+    return summarize(len(cards), time.perf_counter() - start, timed.latencies)
+
+
+def bench_render_cards_parallel(cards, service: RendererService, workers: int) -> Dict[str, Any]:
+    start = time.perf_counter()
+    results = service.render_cards_parallel(cards, workers=workers, force=True)
+    summary = summarize(len(cards), time.perf_counter() - start)
+    summary["workers"] = workers
+    summary["failed"] = sum(1 for r in results if not r.ok)
+    return summary
+
+
+def bench_pdf_export(cards, service: RendererService, exporter: ExportService, output_path: str) -> Dict[str, Any]:
+    timed = TimedIterator(service.render_images(cards))
+    start = time.perf_counter()
+    exporter.export_rendered_to_pdf(timed, output_path)
+    summary = summarize(len(cards), time.perf_counter() - start, timed.latencies)
+    summary["pdf_bytes"] = os.path.getsize(output_path)
+    return summary
+
+
+def run_stage(stage: str, size: int, workers: Optional[int], workdir: str, artwork: List[str]) -> Dict[str, Any]:
+    """Виконує один етап бенчмарку; викликається в окремому процесі, тож пікове RSS належить лише йому"""
+    cards = generate_deck(size, artwork)
+    artwork_cache = ArtworkCache(cache_dir=os.path.join(workdir, f"art_cache_{stage}_{size}"))
+    renderer = CardRenderer(artwork_cache=artwork_cache)
+    service = RendererService(renderer, output_dir=os.path.join(workdir, f"{stage}_{size}"))
+    # RSS після підготовки колоди та рендерера: різниця з піком - споживання самого етапу
+    baseline = peak_rss_mb()
+
+    try:
+        if stage == "card_renderer":
+            result = bench_card_renderer(cards, renderer)
+        elif stage == "render_cards":
+            result = bench_render_cards(cards, service)
+        elif stage == "render_cards_parallel":
+            result = bench_render_cards_parallel(cards, service, workers)
+        else:
+            pdf_exporter = PDFExporter(dpi=config.get("renderer.default_dpi"))
+            try:
+                result = bench_pdf_export(
+                    cards, service, ExportService(pdf_exporter), os.path.join(workdir, f"deck_{size}.pdf")
+                )
+            finally:
+                pdf_exporter.close()
+    finally:
+        service.close()
+
+    # RUSAGE_CHILDREN враховує лише завершені процеси, тож пік знімається після зупинки пулів
+    result["peak_rss_mb"] = peak_rss_mb()
+    result["baseline_rss_mb"] = baseline
+    return result
+
+
+def run(sizes: List[int], workers: Optional[int], skip_pdf: bool) -> Dict[str, Any]:
+    workdir = tempfile.mkdtemp(prefix="ls_bench_")
+    try:
+        artwork = generate_artwork(os.path.join(workdir, "artwork"))
+
+        stage_names = ["card_renderer", "render_cards"]
+        if workers and workers > 1:
+            stage_names.append("render_cards_parallel")
+        if not skip_pdf:
+            stage_names.append("pdf_export")
+
+        # ru_maxrss - максимум за весь час життя процесу, тому кожен етап виконується
+        # у новому процесі, інакше наступні етапи успадковують пік попередніх
+        context = multiprocessing.get_context("spawn")
+
+        results = {}
+        for size in sizes:
+            print(f"[INFO] Колода з {size} карток")
+            stages = {}
+            for name in stage_names:
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    stages[name] = executor.submit(run_stage, name, size, workers, workdir, artwork).result()
+
+            for name, stage in stages.items():
+                print(
+                    f"  {name:<24} {stage['cards_per_sec']:>10} карток/с  "
+                    f"p50={stage['p50_ms']} мс  p99={stage['p99_ms']} мс  "
+                    f"RSS={stage['peak_rss_mb']['self']}+{stage['peak_rss_mb']['children']} МБ"
+                )
+
+            results[str(size)] = stages
+
+        return {
+            "meta": {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "app_version": config.get("app.version"),
+                "renderer_version": CardRenderer.VERSION,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "workers": workers,
+            },
+            "results": results,
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare(current: Dict[str, Any], baseline_path: str):
+    """Друкує зміну пропускної здатності відносно збереженого результату"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    print(f"\nПорівняння з {baseline_path} (renderer {baseline['meta'].get('renderer_version')}):")
+    for size, stages in current["results"].items():
+        for name, stage in stages.items():
+            old = baseline.get("results", {}).get(size, {}).get(name)
+            if not old or not old.get("cards_per_sec") or not stage.get("cards_per_sec"):
+                continue
+            ratio = stage["cards_per_sec"] / old["cards_per_sec"]
+            print(f"  {size:>6} {name:<24} x{ratio:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк рендерингу карток на синтетичних колодах")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--workers", type=int, default=None, help="Кількість процесів для паралельного рендерингу")
+    parser.add_argument("--skip-pdf", action="store_true", help="Не вимірювати експорт у PDF")
+    parser.add_argument("--output", default=None, help="Шлях до JSON з результатами")
+    parser.add_argument("--compare", default=None, help="JSON попереднього запуску для порівняння")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.workers, args.skip_pdf)
+
+    output = args.output or os.path.join(
+        project_root, "benchmarks", "results",
+        f"render_v{CardRenderer.VERSION}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=4, ensure_ascii=False)
+    print(f"\n[INFO] Результати збережено у {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import os
+import random
+from typing import List
+
+from PIL import Image, ImageDraw
+
+from core.models.card import Card, CardStats
+
+CARD_TYPES = ["unit", "tactic", "equipment", "event", "thematic"]
+COST_TYPES = ["BF", "MF", "GF"]
+
+NAMES = [
+    "Десантник", "Штурмова група", "Розвідник", "Кулеметник", "Снайпер",
+    "Медик", "Сапер", "Зв'язківець", "Мінометник", "Командир взводу",
+]
+
+PHRASES = [
+    "Коли ця картка входить у гру, завдайте 2 шкоди кожному ворожому юніту в радіусі дії.",
+    "Поки цей юніт у резерві, союзні юніти отримують +1 до ініціативи.",
+    "Один раз за хід: перемістіть союзний юніт на одну клітинку без витрати руху.",
+    "Якщо ворожий юніт атакує цей юніт, зменшіть шкоду на 1.",
+    "Візьміть картку. Якщо це тактика, розіграйте її безкоштовно.",
+    "Оберіть сектор поля бою: до кінця раунду ворожі юніти в ньому мають -1 STB.",
+]
+
+
+def generate_artwork(directory: str, count: int = 8, size=(664, 1040), seed: int = 0) -> List[str]:
+    """Створює набір синтетичних ілюстрацій розміру, типового для генератора ШІ"""
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    paths = []
+
+    for i in range(count):
+        image = Image.new("RGB", size, tuple(rng.randrange(256) for _ in range(3)))
+        draw = ImageDraw.Draw(image)
+        for _ in range(40):
+            x0, y0 = rng.randrange(size[0]), rng.randrange(size[1])
+            x1, y1 = x0 + rng.randrange(20, 300), y0 + rng.randrange(20, 300)
+            draw.ellipse((x0, y0, x1, y1), fill=tuple(rng.randrange(256) for _ in range(3)))
+
+        path = os.path.join(directory, f"art_{i}.png")
+        image.save(path)
+        paths.append(path)
+
+    return paths
+
+
+def generate_deck(size: int, artwork: List[str], artwork_ratio: float = 0.7, seed: int = 0) -> List[Card]:
+    """Генерує колоду з усіма п'ятьма типами карток, довгими описами, з ілюстраціями та без"""
+    rng = random.Random(seed)
+    cards = []
+
+    for i in range(size):
+        card_type = CARD_TYPES[i % len(CARD_TYPES)]
+        description = " ".join(rng.choice(PHRASES) for _ in range(rng.randint(1, 4)))
+
+        stats = None
+        if card_type == "unit":
+            stats = CardStats(*(rng.randint(0, 9) for _ in range(6)))
+
+        image_path = rng.choice(artwork) if artwork and rng.random() < artwork_ratio else None
+
+        cards.append(Card(
+            name=f"{rng.choice(NAMES)} {i}",
+            type=card_type,
+            cost=rng.randint(0, 9),
+            cost_type=rng.choice(COST_TYPES),
+            stats=stats,
+            description=description,
+            image_path=image_path,
+        ))
+
+    return cards
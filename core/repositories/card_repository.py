@@ -50,7 +50,7 @@ class CardRepository:
         file_path = self._resolve_path(filename)
 
         with open(file_path, 'w', encoding='utf-8', newline='') as file:
-            fieldnames = ['name', 'type', 'cost', 'cost_type', 'atk', 'def', 'stb', 'init', 'rng', 'move', 'description']
+            fieldnames = ['name', 'type', 'cost', 'cost_type', 'atk', 'def', 'stb', 'init', 'rng', 'move', 'description', 'image_path']
             writer = csv.DictWriter(file, fieldnames=fieldnames)
 
             writer.writeheader()
@@ -88,7 +88,8 @@ class CardRepository:
             cost=int(data.get('cost', 0)),
             cost_type=data.get('cost_type', ''),
             stats=stats,
-            description=data.get('description', '')
+            description=data.get('description', ''),
+            image_path=data.get('image_path') or None
         )
 
     def _card_to_dict(self, card: Card) -> Dict[str, Any]:
@@ -111,4 +112,7 @@ class CardRepository:
                 'move': card.stats.move
             })
 
+        if card.image_path:
+            data['image_path'] = card.image_path
+
         return data
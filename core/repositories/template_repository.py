@@ -60,6 +60,7 @@ class TemplateRepository:
                     "font": {"family": "Montserrat", "size": 32, "bold": True},
                     "color": "#FFFFFF",
                     "text_width": 520,
+                    "text_height": 48,
                     "z": 5
                 },
                 "type": {
@@ -77,6 +78,7 @@ class TemplateRepository:
                     "font": {"family": "Montserrat", "size": 18},
                     "color": "#FFFFFF",
                     "text_width": 520,
+                    "text_height": 200,
                     "z": 5
                 },
                 "cost": {
@@ -118,6 +120,30 @@ class TemplateRepository:
                     "font": {"family": "Montserrat", "size": 20, "bold": True},
                     "color": "#FFFFFF",
                     "z": 6
+                },
+                "stat_init": {
+                    "type": "text",
+                    "text": "INIT 0",
+                    "pos": {"x": 380, "y": 740},
+                    "font": {"family": "Montserrat", "size": 20, "bold": True},
+                    "color": "#FFFFFF",
+                    "z": 6
+                },
+                "stat_rng": {
+                    "type": "text",
+                    "text": "RNG 0",
+                    "pos": {"x": 380, "y": 780},
+                    "font": {"family": "Montserrat", "size": 20, "bold": True},
+                    "color": "#FFFFFF",
+                    "z": 6
+                },
+                "stat_move": {
+                    "type": "text",
+                    "text": "MOVE 0",
+                    "pos": {"x": 380, "y": 820},
+                    "font": {"family": "Montserrat", "size": 20, "bold": True},
+                    "color": "#FFFFFF",
+                    "z": 6
                 }
             }
         }
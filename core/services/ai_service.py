@@ -1,13 +1,21 @@
 
-from typing import List, Optional, Callable
+from typing import Callable, Dict, List, Optional
 from core.models.card import Card
-from infrastructure.ai.image_generator import ImageGenerator
+from infrastructure.ai.image_generator import Draft, ImageGenerator
+from infrastructure.ai.job_queue import GenerationJob, GenerationQueue
 
 class AIService:
     def __init__(self, image_generator: ImageGenerator):
         self.image_generator = image_generator
 
-    def generate_card_image(self, card: Card, count: int = 1, is_aborted: Optional[Callable[[], bool]] = None) -> List[str]:
+    def generate_card_image(
+        self,
+        card: Card,
+        count: int = 1,
+        is_aborted: Optional[Callable[[], bool]] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        seed: Optional[int] = None,
+    ) -> List[str]:
         """Генерує зображення для картки"""
         prompt = self._create_prompt(card)
         return self.image_generator.generate_images(
@@ -15,9 +23,88 @@ class AIService:
             count=count,
             width=664,
             height=1040,
-            is_aborted=is_aborted
+            is_aborted=is_aborted,
+            seed=seed,
+            progress_callback=progress_callback,
         )
 
+    def generate_card_drafts(
+        self,
+        card: Card,
+        count: int = 8,
+        is_aborted: Optional[Callable[[], bool]] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        seed: Optional[int] = None,
+    ) -> List[Draft]:
+        """Генерує швидкі чернетки ілюстрації для картки; інший сід - інший набір чернеток"""
+        prompt = self._create_prompt(card)
+        return self.image_generator.generate_drafts(
+            prompt=prompt,
+            count=count,
+            width=664,
+            height=1040,
+            is_aborted=is_aborted,
+            seed=seed,
+            progress_callback=progress_callback,
+        )
+
+    def refine_drafts(self, drafts: List[Draft], is_aborted: Optional[Callable[[], bool]] = None) -> List[str]:
+        """Доводить вибрані чернетки до повної роздільності"""
+        paths = []
+        for draft in drafts:
+            if is_aborted and is_aborted():
+                break
+            paths.append(self.image_generator.refine_draft(draft))
+        return paths
+
+    def run_queue(
+        self,
+        queue: GenerationQueue,
+        cards: Optional[List[Card]] = None,
+        is_aborted: Optional[Callable[[], bool]] = None,
+        on_job_finished: Optional[Callable[[GenerationJob, Card], None]] = None,
+    ) -> int:
+        """Виконує завдання черги до її вичерпання або переривання; повертає кількість виконаних.
+
+        Промпт будується з актуальних даних картки з cards; якщо колода не завантажена,
+        картка відновлюється зі знімка в завданні. Картки тут не змінюються: метод
+        працює у фоновому потоці, а image_path усім копіям картки призначає
+        GenerationQueue.apply_results у потоці інтерфейсу.
+        """
+        cards_by_name: Dict[str, List[Card]] = {}
+        for card in cards or []:
+            cards_by_name.setdefault(card.name, []).append(card)
+        completed = 0
+
+        while not (is_aborted and is_aborted()):
+            job = queue.next_job()
+            if job is None:
+                break
+
+            copies = cards_by_name.get(job.card_name)
+            card = copies[0] if copies else job.to_card()
+
+            try:
+                # Сід виводиться з промпту, тож повторене завдання бере готові зображення зі сховища
+                image_paths = self.generate_card_image(card, job.count, is_aborted)
+            except Exception as e:
+                print(f"[ERROR] Генерація для картки '{job.card_name}' не вдалася: {e}")
+                queue.fail(job, str(e))
+                continue
+
+            if len(image_paths) < job.count:
+                # Перервано посеред завдання: воно буде повторене при наступному запуску
+                queue.release(job)
+                break
+
+            queue.complete(job, image_paths)
+            completed += 1
+
+            if on_job_finished:
+                on_job_finished(job, card)
+
+        return completed
+
     def _create_prompt(self, card: Card) -> str:
         """Створює промпт на основі даних картки"""
         base_prompt = f"{card.name}"
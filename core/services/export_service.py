@@ -1,5 +1,5 @@
-
-from typing import List
+from typing import Callable, Iterable, List, Sequence, Tuple, Union
+from PIL import Image
 from infrastructure.storage.pdf_exporter import PDFExporter
 
 class ExportService:
@@ -13,3 +13,30 @@ class ExportService:
     def export_deck_to_pdf(self, card_paths: List[str], output_path: str) -> str:
         """Експортує колоду карток у PDF"""
         return self.pdf_exporter.export_images(card_paths, output_path)
+
+    def export_rendered_to_pdf(
+        self, images: Iterable[Union[Image.Image, str]], output_path: str, streaming: bool = True
+    ) -> str:
+        """Експортує у PDF відрендерені в пам'яті картки без проміжного кодування PNG.
+
+        Сторінки пишуться на диск одразу, тож пам'ять не залежить від розміру колоди.
+        streaming залишено для сумісності: після переходу з fpdf2 на власний
+        потоковий PDF-писач обидва режими збігаються.
+        """
+        return self.pdf_exporter.export_images_streaming(images, output_path)
+
+    def export_rendered_duplex(
+        self, images: Iterable[Union[Image.Image, str]], back_image_path: str, output_path: str
+    ) -> str:
+        """Експортує лицьові сторони та спільний зворот для двостороннього друку за один прохід колодою"""
+        pairs = ((image, back_image_path) for image in images)
+        return self.pdf_exporter.export_duplex(pairs, output_path)
+
+    def export_incremental(
+        self, cards: Sequence[Tuple[str, Callable[[], Union[Image.Image, str]]]], output_path: str
+    ) -> str:
+        """Експортує картки у PDF, перебудовуючи лише сторінки зі зміненими картками.
+
+        cards - пари (ключ вмісту, відкладений рендер) з RendererService.card_sources.
+        """
+        return self.pdf_exporter.export_incremental(cards, output_path)
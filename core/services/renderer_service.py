@@ -1,26 +1,229 @@
-
-from typing import List
+import os
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+from PIL import Image
 from core.models.card import Card
 from infrastructure.renderer.card_renderer import CardRenderer
+from infrastructure.renderer.batch_renderer import BatchRenderer, ProgressCallback, RenderResult
+from infrastructure.renderer.render_cache import RenderCache
 
 class RendererService:
-    def __init__(self, card_renderer: CardRenderer):
+    def __init__(
+        self,
+        card_renderer: CardRenderer,
+        output_dir: str = "export",
+        render_cache: Optional[RenderCache] = None,
+    ):
         self.card_renderer = card_renderer
+        self.output_dir = output_dir
+        self.render_cache = render_cache or RenderCache(os.path.join(output_dir, ".render_cache.json"))
+        self._batch_renderer: Optional[BatchRenderer] = None
 
-    def render_card(self, card: Card, template_path: str = None) -> str:
-        """Рендерить картку та повертає шлях до збереженого файлу"""
-        image = self.card_renderer.render(card, template_path)
+    def _output_path(self, card: Card, key: Optional[str] = None) -> str:
+        """Повертає шлях до файлу рендеру картки; key розрізняє різні картки з однаковою назвою"""
+        suffix = f"_{key[:12]}" if key else ""
+        return os.path.join(self.output_dir, f"rendered_{card.name.replace(' ', '_')}{suffix}.png")
+
+    def _render_to_file(self, card: Card, template_path: str, language: str, fingerprint: str, force: bool) -> str:
+        """Рендерить картку у файл, якщо її вхідні дані змінилися з попереднього рендеру"""
+        output_path = self._output_path(card)
+        key = self.render_cache.card_key(card, fingerprint, language)
+
+        if not force and self.render_cache.is_fresh(output_path, key):
+            return output_path
+
+        image = self.card_renderer.render(card, template_path, language)
 
         # Зберігаємо зображення
-        output_path = f"export/rendered_{card.name.replace(' ', '_')}.png"
+        os.makedirs(self.output_dir, exist_ok=True)
         image.save(output_path)
+        self.render_cache.update(output_path, key)
+
+        return output_path
+
+    def render_card(
+        self, card: Card, template_path: str = None, language: Optional[str] = None, force: bool = False
+    ) -> str:
+        """Рендерить картку та повертає шлях до збереженого файлу"""
+        language = language or self.card_renderer.language
+        fingerprint = self.card_renderer.fingerprint(template_path, language=language)
 
+        output_path = self._render_to_file(card, template_path, language, fingerprint, force)
+        self.render_cache.save()
         return output_path
 
-    def render_cards(self, cards: List[Card], template_path: str = None) -> List[str]:
+    def render_cards(
+        self, cards: List[Card], template_path: str = None, language: Optional[str] = None, force: bool = False
+    ) -> List[str]:
         """Рендерить список карток та повертає шляхи до збережених файлів"""
+        language = language or self.card_renderer.language
+        fingerprint = self.card_renderer.fingerprint(template_path, language=language)
+
         rendered_paths = []
-        for card in cards:
-            path = self.render_card(card, template_path)
-            rendered_paths.append(path)
+        try:
+            for card in cards:
+                path = self._render_to_file(card, template_path, language, fingerprint, force)
+                rendered_paths.append(path)
+        finally:
+            self.render_cache.save()
         return rendered_paths
+
+    def render_images(
+        self,
+        cards: List[Card],
+        template_path: str = None,
+        language: Optional[str] = None,
+        save_images: bool = False,
+        dpi: Optional[int] = None,
+    ) -> Iterator[Union[Image.Image, str]]:
+        """Ліниво рендерить картки у пам'яті для подальшого експорту без проміжних PNG.
+
+        Для карток зі свіжим рендером на диску повертається шлях до файлу; нові PNG
+        записуються лише якщо save_images=True. Якщо задано dpi, картки рендеряться
+        безпосередньо у цій роздільності.
+        """
+        language = language or self.card_renderer.language
+        scale = self.card_renderer.resolve_scale(template_path, dpi=dpi)
+        fingerprint = self.card_renderer.fingerprint(template_path, scale, language)
+
+        try:
+            for card in cards:
+                output_path = self._output_path(card)
+                key = self.render_cache.card_key(card, fingerprint, language)
+
+                if self.render_cache.is_fresh(output_path, key):
+                    yield output_path
+                    continue
+
+                image = self.card_renderer.render(card, template_path, language, scale)
+                if save_images:
+                    os.makedirs(self.output_dir, exist_ok=True)
+                    image.save(output_path)
+                    self.render_cache.update(output_path, key)
+
+                yield image
+        finally:
+            self.render_cache.save()
+
+    def card_sources(
+        self,
+        cards: List[Card],
+        template_path: str = None,
+        language: Optional[str] = None,
+        dpi: Optional[int] = None,
+    ) -> List[Tuple[str, Callable[[], Union[Image.Image, str]]]]:
+        """Повертає для кожної картки (ключ вмісту, відкладений рендер) без самого рендерингу.
+
+        Ключ залежить від полів картки, ілюстрації, шаблону та мови, тож інкрементний
+        експорт може визначити змінені картки й рендерити лише їх.
+        """
+        language = language or self.card_renderer.language
+        scale = self.card_renderer.resolve_scale(template_path, dpi=dpi)
+        fingerprint = self.card_renderer.fingerprint(template_path, scale, language)
+
+        def loader(card: Card, key: str) -> Callable[[], Union[Image.Image, str]]:
+            def load() -> Union[Image.Image, str]:
+                output_path = self._output_path(card)
+                if self.render_cache.is_fresh(output_path, key):
+                    return output_path
+                return self.card_renderer.render(card, template_path, language, scale)
+            return load
+
+        sources = []
+        for card in cards:
+            key = self.render_cache.card_key(card, fingerprint, language)
+            sources.append((key, loader(card, key)))
+        return sources
+
+    def render_preview(
+        self, card: Card, height: int = 256, template_path: str = None, language: Optional[str] = None
+    ) -> Image.Image:
+        """Рендерить зменшену копію картки для інтерфейсу без повнорозмірного рендеру"""
+        plan = self.card_renderer.get_plan(template_path)
+        return self.card_renderer.render(card, template_path, language, scale=height / plan.height)
+
+    def render_cards_parallel(
+        self,
+        cards: List[Card],
+        template_path: str = None,
+        workers: Optional[int] = None,
+        progress_callback: Optional[ProgressCallback] = None,
+        language: Optional[str] = None,
+        force: bool = False,
+    ) -> List[RenderResult]:
+        """Рендерить картки паралельно у пулі процесів, зберігаючи порядок карток.
+
+        Картки, вхідні дані яких не змінилися з попереднього рендеру, у пул не передаються.
+        """
+        language = language or self.card_renderer.language
+        fingerprint = self.card_renderer.fingerprint(template_path, language=language)
+        total = len(cards)
+
+        results: List[Optional[RenderResult]] = [None] * total
+        stale = []
+        # Копії однієї картки рендеряться один раз; індекси копій -> позиція оригіналу в stale
+        duplicates: List[Tuple[int, int]] = []
+        pending: Dict[str, int] = {}
+        claimed: Dict[str, str] = {}
+        done = 0
+        for index, card in enumerate(cards):
+            key = self.render_cache.card_key(card, fingerprint, language)
+            output_path = self._output_path(card)
+            if claimed.setdefault(output_path, key) != key:
+                # Інша картка з тією ж назвою: окремий файл, щоб процеси не писали в один
+                output_path = self._output_path(card, key)
+
+            if not force and self.render_cache.is_fresh(output_path, key):
+                results[index] = RenderResult(index, card.name, path=output_path)
+                done += 1
+                if progress_callback:
+                    progress_callback(done, total, results[index])
+            elif key in pending:
+                duplicates.append((index, pending[key]))
+            else:
+                pending[key] = len(stale)
+                stale.append((index, card, output_path, key))
+
+        if not stale:
+            return results
+
+        renderer_config = self.card_renderer.worker_config()
+        if (
+            self._batch_renderer is None
+            or (workers and self._batch_renderer.workers != workers)
+            or self._batch_renderer.renderer_config != renderer_config
+        ):
+            self.close()
+            self._batch_renderer = BatchRenderer(renderer_config, workers)
+
+        def on_progress(current: int, _: int, result: RenderResult):
+            # Переводимо індекс у пакеті в індекс у вхідному списку карток
+            result.index = stale[result.index][0]
+            if progress_callback:
+                progress_callback(done + current, total, result)
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        jobs = [(card, output_path) for _, card, output_path, _ in stale]
+        try:
+            batch_results = self._batch_renderer.render(jobs, template_path, on_progress, language)
+            for (index, _, output_path, key), result in zip(stale, batch_results):
+                results[index] = result
+                if result.ok:
+                    self.render_cache.update(output_path, key)
+        finally:
+            self.render_cache.save()
+
+        done += len(stale)
+        for index, position in duplicates:
+            original = results[stale[position][0]]
+            results[index] = RenderResult(index, original.card_name, path=original.path, error=original.error)
+            done += 1
+            if progress_callback:
+                progress_callback(done, total, results[index])
+
+        return results
+
+    def close(self):
+        """Звільняє пул процесів пакетного рендерингу"""
+        if self._batch_renderer is not None:
+            self._batch_renderer.close()
+            self._batch_renderer = None
@@ -0,0 +1,98 @@
+import contextlib
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import torch
+
+
+@dataclass
+class CPUProfile:
+    """Налаштування інференсу SDXL на CPU"""
+    threads: Optional[int] = None  # Потоки всередині операцій; None - за замовчуванням torch
+    interop_threads: Optional[int] = None  # Потоки між операціями
+    channels_last: bool = True  # Формат пам'яті NHWC для згорток UNet та VAE
+    bf16: str = "auto"  # Автокаст у bfloat16: "auto" - якщо CPU підтримує, "on", "off"
+    sdpa: bool = True  # scaled_dot_product_attention замість нарізання уваги
+    compile_unet: bool = False  # torch.compile для UNet: довгий перший запуск, швидші наступні
+
+    @classmethod
+    def from_config(cls, values: Optional[Dict[str, Any]]) -> "CPUProfile":
+        values = values or {}
+        return cls(**{key: value for key, value in values.items() if key in cls.__dataclass_fields__})
+
+
+def bf16_supported() -> bool:
+    """Чи має CPU апаратну підтримку bfloat16 (AVX512-BF16 / AMX)"""
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except Exception:
+        return False
+
+
+def use_bf16(profile: CPUProfile) -> bool:
+    """Чи вмикати автокаст bfloat16 для профілю"""
+    if profile.bf16 == "on":
+        return True
+    if profile.bf16 == "auto":
+        return bf16_supported()
+    return False
+
+
+def apply_threads(profile: CPUProfile):
+    """Задає кількість потоків torch"""
+    if profile.threads:
+        torch.set_num_threads(profile.threads)
+    if profile.interop_threads:
+        try:
+            torch.set_num_interop_threads(profile.interop_threads)
+        except RuntimeError:
+            # Дозволено лише до першої паралельної операції
+            print("[WARN] interop_threads не застосовано: torch уже виконував паралельні операції")
+
+
+def configure_pipeline(pipe: Any, profile: CPUProfile) -> Dict[str, Any]:
+    """Застосовує CPU-профіль до пайплайна та повертає фактично увімкнені опції"""
+    apply_threads(profile)
+    applied: Dict[str, Any] = {
+        "threads": torch.get_num_threads(),
+        "interop_threads": torch.get_num_interop_threads(),
+    }
+
+    sdpa = False
+    if profile.sdpa and hasattr(torch.nn.functional, "scaled_dot_product_attention"):
+        try:
+            from diffusers.models.attention_processor import AttnProcessor2_0
+
+            pipe.unet.set_attn_processor(AttnProcessor2_0())
+            sdpa = True
+        except Exception as e:
+            print(f"[WARN] SDPA недоступне: {e}")
+    if not sdpa:
+        pipe.enable_attention_slicing()
+    applied["attention"] = "sdpa" if sdpa else "slicing"
+
+    if profile.channels_last:
+        pipe.unet.to(memory_format=torch.channels_last)
+        pipe.vae.to(memory_format=torch.channels_last)
+    applied["channels_last"] = profile.channels_last
+
+    applied["bf16_autocast"] = use_bf16(profile)
+
+    compiled = False
+    if profile.compile_unet and hasattr(torch, "compile"):
+        try:
+            pipe.unet = torch.compile(pipe.unet)
+            compiled = True
+        except Exception as e:
+            print(f"[WARN] torch.compile не вдалося: {e}")
+    applied["compile_unet"] = compiled
+
+    print("[INFO] CPU-профіль: " + ", ".join(f"{key}={value}" for key, value in applied.items()))
+    return applied
+
+
+def autocast(enabled: bool):
+    """Контекст автокасту bfloat16 на CPU"""
+    if enabled:
+        return torch.autocast("cpu", dtype=torch.bfloat16)
+    return contextlib.nullcontext()
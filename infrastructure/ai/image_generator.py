@@ -1,13 +1,95 @@
 
-import os
+import hashlib
 import threading
-from typing import Callable, List, Optional
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import torch
+from PIL import Image
+
+from infrastructure.ai.cpu_profile import CPUProfile, autocast, configure_pipeline, use_bf16
+from infrastructure.ai.pipeline_cache import PipelineCache
+from infrastructure.ai.prompt_cache import PromptEmbeddingCache, PromptEmbeddings
+from infrastructure.ai.result_store import ResultStore, model_fingerprint
+from infrastructure.storage.file_hash import file_hasher
+
+# Стани завантаження моделі
+LOAD_IDLE = "idle"
+LOAD_LOADING = "loading"
+LOAD_WARMING = "warming"
+LOAD_READY = "ready"
+LOAD_FAILED = "failed"
+
+# Планувальник та guidance входять до ключа сховища результатів
+SCHEDULER = "DPMSolverMultistepScheduler"
+GUIDANCE_SCALE = 5.0
+
+NEGATIVE_PROMPT = "low quality, jpeg artifacts, blurry, distorted, watermark, text, logo, signature, extra limbs, extra fingers, mutation, disfigured, poorly drawn hands, malformed anatomy, long neck, duplicate body"
+
+
+def default_seed(prompt: str) -> int:
+    """Детермінований сід за промптом: однаковий запит без сіду дає однакові зображення"""
+    digest = hashlib.sha256(f"{prompt}\n{NEGATIVE_PROMPT}".encode("utf-8")).hexdigest()
+    return int(digest[:8], 16)
+
+
+def _is_out_of_memory(exc: BaseException) -> bool:
+    """Перевіряє, чи виняток спричинений нестачею пам'яті (GPU або CPU)"""
+    if isinstance(exc, MemoryError):
+        return True
+    oom_error = getattr(torch.cuda, "OutOfMemoryError", None)
+    if oom_error is not None and isinstance(exc, oom_error):
+        return True
+    return isinstance(exc, RuntimeError) and "out of memory" in str(exc).lower()
+
+
+@dataclass
+class Draft:
+    """Чернетка низької роздільності; доопрацьовується до повного розміру з тим самим сідом"""
+    path: str
+    prompt: str
+    seed: int
+    width: int  # Розмір фінального зображення
+    height: int
+
+
+def _draft_size(width: int, height: int, scale: float) -> Tuple[int, int]:
+    # SDXL вимагає розмірів, кратних 8
+    return max(8, int(width * scale) // 8 * 8), max(8, int(height * scale) // 8 * 8)
+
 
 class ImageGenerator:
-    def __init__(self, model_path: str = "ai/models/realvisxl"):
+    def __init__(
+        self,
+        model_path: str = "ai/models/realvisxl",
+        batch_size: int = 4,
+        pipeline_cache: Optional[PipelineCache] = None,
+        prompt_cache: Optional[PromptEmbeddingCache] = None,
+        cpu_profile: Optional[CPUProfile] = None,
+        draft_scale: float = 0.5,
+        draft_steps: int = 8,
+        refine_strength: float = 0.5,
+        result_store: Optional[ResultStore] = None,
+    ):
         self.model_path = model_path
+        self.batch_size = max(1, batch_size)
+        self.pipelines = pipeline_cache or PipelineCache()
+        self.prompt_cache = prompt_cache or PromptEmbeddingCache()
+        self.cpu_profile = cpu_profile or CPUProfile()
+        self.results = result_store or ResultStore()
+        self._bf16 = False
+
+        # Чернетки: менший розмір та менше кроків; доопрацювання через img2img
+        self.draft_scale = draft_scale
+        self.draft_steps = draft_steps
+        self.refine_strength = refine_strength
+        self._img2img = None
+
+        # Стан фонового завантаження
+        self._status: Dict[str, Any] = {"model": None, "state": LOAD_IDLE, "progress": 0.0, "error": None}
+        self._status_lock = threading.Lock()
+        self._preload_thread: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
         self.pipe = None
         self.current_model = None
         self._lock = threading.Lock()
@@ -15,61 +97,202 @@ class ImageGenerator:
         # Налаштування для оптимізації
         torch.set_float32_matmul_precision("medium")
 
+    def set_model(self, model_path: str):
+        """Перемикає модель; завантажені раніше моделі беруться з кешу пайплайнів"""
+        self.model_path = model_path
+
+    def _set_status(self, state: str, progress: float, model: Optional[str] = None, error: Optional[str] = None):
+        with self._status_lock:
+            self._status = {"model": model or self._status["model"], "state": state, "progress": progress, "error": error}
+            status = dict(self._status)
+        for listener in list(self._listeners):
+            listener(status)
+
+    def load_status(self) -> Dict[str, Any]:
+        """Повертає стан завантаження: модель, стан (idle/loading/warming/ready/failed), прогрес 0..1, помилку"""
+        with self._status_lock:
+            return dict(self._status)
+
+    def add_load_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        """Підписує функцію на зміни стану завантаження (викликається з фонового потоку)"""
+        self._listeners.append(listener)
+
+    def preload(self, model_path: Optional[str] = None) -> threading.Thread:
+        """Починає завантаження та прогрів моделі у фоновому потоці.
+
+        Перший виклик generate_images дочекається завершення завантаження замість
+        того, щоб починати його заново.
+        """
+        if model_path:
+            self.set_model(model_path)
+
+        thread = threading.Thread(target=self._preload, name="model-preload", daemon=True)
+        self._preload_thread = thread
+        thread.start()
+        return thread
+
+    def _preload(self):
+        try:
+            self._load_model()
+        except Exception as e:
+            # Помилка зберігається у стані; generate_images спробує завантажити модель ще раз
+            print(f"[ERROR] Фонове завантаження моделі не вдалося: {e}")
+
+    def wait_until_loaded(self, timeout: Optional[float] = None) -> bool:
+        """Чекає на завершення фонового завантаження; повертає True, якщо модель готова"""
+        thread = self._preload_thread
+        if thread is not None:
+            thread.join(timeout)
+        return self.load_status()["state"] == LOAD_READY
+
+    def _runtime(self) -> Tuple[torch.device, torch.dtype, bool]:
+        """Пристрій, dtype та автокаст bf16, з якими генеруватимуться зображення"""
+        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        dtype = torch.float16 if device.type == "cuda" else torch.float32
+        return device, dtype, device.type == "cpu" and use_bf16(self.cpu_profile)
+
     def _load_model(self):
         """Завантажує модель, якщо вона ще не завантажена"""
         with self._lock:
             if self.pipe is not None and self.current_model == self.model_path:
                 return
 
-            print(f"[INFO] Завантаження моделі: {self.model_path}")
-
-            try:
-                from diffusers import DPMSolverMultistepScheduler, StableDiffusionXLPipeline
-            except Exception as exc:  # pragma: no cover - defensive import guard
-                raise RuntimeError(
-                    "Не вдалося імпортувати diffusers. Спробуйте видалити або перевстановити xformers, "
-                    "якщо використовуєте CPU."
-                ) from exc
-
-            device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-            dtype = torch.float16 if device.type == "cuda" else torch.float32
+            device, dtype, bf16 = self._runtime()
             # Keep loading the fp16 checkpoint even on CPU to align with bundled weights
             variant = "fp16"
 
-            self.pipe = StableDiffusionXLPipeline.from_pretrained(
-                self.model_path,
-                torch_dtype=dtype,
-                use_safetensors=True,
-                variant=variant,
-            ).to(device)
+            model_path = self.model_path
+            # img2img тримає компоненти попереднього пайплайна; без скидання стара модель
+            # лишається в пам'яті навіть після витіснення з кешу пайплайнів
+            self._img2img = None
+            self._set_status(LOAD_LOADING, 0.0, model_path)
+            try:
+                self.pipe = self.pipelines.get(
+                    model_path, dtype, device,
+                    lambda shared: self._create_pipeline(model_path, dtype, device, variant, shared),
+                    variant=variant,
+                )
+            except Exception as e:
+                self._set_status(LOAD_FAILED, 0.0, model_path, str(e))
+                raise
+            self.current_model = model_path
+            self._bf16 = bf16
+            self._set_status(LOAD_READY, 1.0, model_path)
+
+    def _create_pipeline(self, model_path: str, dtype: torch.dtype, device: torch.device, variant: str, shared: dict):
+        """Завантажує та прогріває пайплайн SDXL; shared - уже завантажені спільні компоненти"""
+        print(f"[INFO] Завантаження моделі: {model_path}")
+
+        try:
+            import diffusers
+            from diffusers import StableDiffusionXLPipeline
+        except Exception as exc:  # pragma: no cover - defensive import guard
+            raise RuntimeError(
+                "Не вдалося імпортувати diffusers. Спробуйте видалити або перевстановити xformers, "
+                "якщо використовуєте CPU."
+            ) from exc
 
+        pipe = StableDiffusionXLPipeline.from_pretrained(
+            model_path,
+            torch_dtype=dtype,
+            use_safetensors=True,
+            variant=variant,
+            **shared,
+        ).to(device)
+        self._set_status(LOAD_LOADING, 0.7)
+
+        if device.type == "cpu":
+            # Потоки, SDPA, channels_last, bf16 та torch.compile з CPU-профілю
+            configure_pipeline(pipe, self.cpu_profile)
+        else:
             # Оптимізації для RTX 3060
-            self.pipe.enable_attention_slicing()
-            try:
-                self.pipe.vae.enable_slicing()
-            except:
-                pass
+            pipe.enable_attention_slicing()
+        try:
+            pipe.vae.enable_slicing()
+        except:
+            pass
 
-            try:
-                self.pipe.vae.enable_tiling()
-            except:
-                pass
+        try:
+            pipe.vae.enable_tiling()
+        except:
+            pass
 
-            # Використовуємо швидкий та якісний scheduler
-            self.pipe.scheduler = DPMSolverMultistepScheduler.from_config(self.pipe.scheduler.config)
+        # Використовуємо швидкий та якісний scheduler
+        pipe.scheduler = getattr(diffusers, SCHEDULER).from_config(pipe.scheduler.config)
 
-            # Прогрів моделі
-            try:
-                _ = self.pipe(
+        # Прогрів моделі
+        self._set_status(LOAD_WARMING, 0.8)
+        try:
+            with autocast(device.type == "cpu" and use_bf16(self.cpu_profile)):
+                _ = pipe(
                     prompt="warmup test",
                     num_inference_steps=1,
                     width=512,
                     height=512
                 )
-            except:
-                pass
+        except:
+            pass
+
+        return pipe
+
+    def _encode_text(self, text: str) -> PromptEmbeddings:
+        """Кодує текст обома текстовими енкодерами SDXL"""
+        prompt_embeds, _, pooled_embeds, _ = self.pipe.encode_prompt(
+            prompt=text,
+            device=self.pipe.device,
+            num_images_per_prompt=1,
+            do_classifier_free_guidance=False,
+        )
+        return prompt_embeds, pooled_embeds
+
+    def _embeddings(self, text: str) -> PromptEmbeddings:
+        """Ембединги тексту з кешу; негативний промпт кодується так само, як позитивний"""
+        model_key = (self.current_model, str(self.pipe.dtype))
+        return self.prompt_cache.get(model_key, text, self._encode_text)
+
+    def _generate_batch(self, prompt: str, seeds: List[int], width: int, height: int, steps: int = 25) -> list:
+        """Генерує кілька зображень одним пакетним циклом денойзингу"""
+        with autocast(self._bf16):
+            prompt_embeds, pooled_embeds = self._embeddings(prompt)
+            negative_embeds, negative_pooled_embeds = self._embeddings(NEGATIVE_PROMPT)
+
+            # Генератори на CPU дають однаковий шум для сіду незалежно від пристрою
+            generators = [torch.Generator("cpu").manual_seed(seed) for seed in seeds]
+            return self.pipe(
+                prompt_embeds=prompt_embeds,
+                pooled_prompt_embeds=pooled_embeds,
+                negative_prompt_embeds=negative_embeds,
+                negative_pooled_prompt_embeds=negative_pooled_embeds,
+                num_inference_steps=steps,
+                width=width,
+                height=height,
+                guidance_scale=GUIDANCE_SCALE,
+                num_images_per_prompt=len(seeds),
+                generator=generators,
+            ).images
 
-            self.current_model = self.model_path
+    def _request_params(self, prompt: str, width: int, height: int, steps: int, seed: int) -> Dict[str, Any]:
+        """Параметри, що однозначно визначають зображення; ключ сховища результатів.
+
+        Пристрій та точність обчислень теж входять до ключа: на GPU у fp16 і на CPU
+        у bf16 той самий сід дає різні зображення.
+        """
+        device, dtype, bf16 = self._runtime()
+        return {
+            "mode": "txt2img",
+            "model": model_fingerprint(self.model_path),
+            "prompt": prompt,
+            "negative_prompt": NEGATIVE_PROMPT,
+            "steps": steps,
+            "width": width,
+            "height": height,
+            "guidance_scale": GUIDANCE_SCALE,
+            "seed": seed,
+            "scheduler": SCHEDULER,
+            "device": device.type,
+            "dtype": str(dtype),
+            "bf16_autocast": bf16,
+        }
 
     def generate_images(
         self, 
@@ -77,31 +300,138 @@ class ImageGenerator:
         count: int = 1, 
         width: int = 664, 
         height: int = 1040, 
-        is_aborted: Optional[Callable[[], bool]] = None
+        is_aborted: Optional[Callable[[], bool]] = None,
+        seed: Optional[int] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        steps: int = 25,
     ) -> List[str]:
-        """Генерує зображення за промптом"""
-        self._load_model()
+        """Генерує зображення за промптом пакетами по batch_size.
+
+        Кожне зображення має власний сід (seed + номер); якщо seed не задано, він
+        виводиться з промпту, тож повторний запит дає ті самі зображення. Готові
+        результати беруться зі сховища без завантаження моделі; генеруються лише
+        відсутні. При нестачі пам'яті пакет зменшується вдвічі.
+        """
+        if seed is None:
+            seed = default_seed(prompt)
+
+        params = self._request_params(prompt, width, height, steps, seed)
+        requests = [dict(params, seed=seed + i) for i in range(count)]
+        results: List[Optional[str]] = [self.results.get(params) for params in requests]
+        missing = [i for i, path in enumerate(results) if path is None]
 
-        images = []
-        os.makedirs("export", exist_ok=True)
+        done = count - len(missing)
+        if done and progress_callback:
+            progress_callback(done, count)
 
-        for i in range(count):
+        batch_size = self.batch_size
+        while missing:
             if is_aborted and is_aborted():
                 break
 
-            # Генерація зображення
-            image = self.pipe(
-                prompt=prompt,
-                negative_prompt="low quality, jpeg artifacts, blurry, distorted, watermark, text, logo, signature, extra limbs, extra fingers, mutation, disfigured, poorly drawn hands, malformed anatomy, long neck, duplicate body",
-                num_inference_steps=25,
-                width=width,
-                height=height,
-                guidance_scale=5.0,
-            ).images[0]
+            self._load_model()
+            batch = missing[:batch_size]
+            seeds = [requests[i]["seed"] for i in batch]
+
+            # Генерація пакета зображень
+            try:
+                batch_images = self._generate_batch(prompt, seeds, width, height, steps)
+            except Exception as e:
+                if len(batch) == 1 or not _is_out_of_memory(e):
+                    raise
+                batch_size = len(batch) // 2
+                print(f"[WARN] Недостатньо пам'яті для пакета з {len(batch)} зображень, зменшуємо до {batch_size}")
+                if torch.cuda.is_available():
+                    torch.cuda.empty_cache()
+                continue
+
+            # Збереження зображень у сховище результатів
+            for index, image in zip(batch, batch_images):
+                results[index] = self.results.put(requests[index], image)
+            missing = missing[len(batch):]
+
+            done += len(batch)
+            if progress_callback:
+                progress_callback(done, count)
+
+        # Лише неперервний початок: i-те зображення завжди має сід seed + i
+        paths = []
+        for path in results:
+            if path is None:
+                break
+            paths.append(path)
+        return paths
+
+    def generate_drafts(
+        self,
+        prompt: str,
+        count: int = 8,
+        width: int = 664,
+        height: int = 1040,
+        is_aborted: Optional[Callable[[], bool]] = None,
+        seed: Optional[int] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+    ) -> List[Draft]:
+        """Генерує дешеві чернетки: розмір зменшено у draft_scale разів, draft_steps кроків.
+
+        width/height - розмір фінального зображення, до якого чернетку доводить refine_draft.
+        Без seed чернетки для того самого промпту беруться зі сховища результатів;
+        для нових варіантів передайте інший сід.
+        """
+        if seed is None:
+            seed = default_seed(prompt)
+
+        draft_width, draft_height = _draft_size(width, height, self.draft_scale)
+        paths = self.generate_images(
+            prompt=prompt,
+            count=count,
+            width=draft_width,
+            height=draft_height,
+            is_aborted=is_aborted,
+            seed=seed,
+            progress_callback=progress_callback,
+            steps=self.draft_steps,
+        )
+        return [Draft(path, prompt, seed + i, width, height) for i, path in enumerate(paths)]
+
+    def _img2img_pipeline(self):
+        """img2img-пайплайн на тих самих компонентах, що й основний (без додаткової пам'яті)"""
+        if self._img2img is None:
+            from diffusers import StableDiffusionXLImg2ImgPipeline
 
-            # Збереження зображення
-            output_path = f"export/ai_{i+1}.png"
-            image.save(output_path)
-            images.append(output_path)
+            self._img2img = StableDiffusionXLImg2ImgPipeline(**self.pipe.components)
+        return self._img2img
+
+    def refine_draft(self, draft: Draft, strength: Optional[float] = None, steps: int = 25) -> str:
+        """Доводить чернетку до повного розміру через img2img з тим самим сідом та промптом"""
+        strength = strength if strength is not None else self.refine_strength
+        params = self._request_params(draft.prompt, draft.width, draft.height, steps, draft.seed)
+        params.update({"mode": "img2img", "strength": strength, "init_image": file_hasher.digest(draft.path)})
+
+        cached = self.results.get(params)
+        if cached is not None:
+            return cached
+
+        self._load_model()
+
+        with Image.open(draft.path) as image:
+            init_image = image.convert("RGB").resize((draft.width, draft.height), Image.LANCZOS)
+
+        pipe = self._img2img_pipeline()
+        with autocast(self._bf16):
+            prompt_embeds, pooled_embeds = self._embeddings(draft.prompt)
+            negative_embeds, negative_pooled_embeds = self._embeddings(NEGATIVE_PROMPT)
+
+            image = pipe(
+                prompt_embeds=prompt_embeds,
+                pooled_prompt_embeds=pooled_embeds,
+                negative_prompt_embeds=negative_embeds,
+                negative_pooled_prompt_embeds=negative_pooled_embeds,
+                image=init_image,
+                strength=strength,
+                num_inference_steps=steps,
+                guidance_scale=GUIDANCE_SCALE,
+                generator=torch.Generator("cpu").manual_seed(draft.seed),
+            ).images[0]
 
-        return images
+        return self.results.put(params, image)
@@ -0,0 +1,231 @@
+import json
+import os
+import shutil
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+from core.models.card import Card, CardStats
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass
+class GenerationJob:
+    card_name: str
+    card: Dict[str, Any]  # Знімок полів картки, щоб черга відновлювалась без завантаженої колоди
+    count: int = 1
+    priority: int = 0
+    seq: int = 0
+    status: str = PENDING
+    attempts: int = 0
+    image_paths: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    updated: float = 0.0
+
+    def to_card(self) -> Card:
+        data = dict(self.card)
+        stats = data.pop("stats", None)
+        return Card(stats=CardStats(**stats) if stats else None, **data)
+
+
+class GenerationQueue:
+    """Постійна черга генерації ілюстрацій: одне завдання на картку, з пріоритетами.
+
+    Стан записується на диск після кожної зміни, тож після збою чи перезапуску
+    незавершені завдання продовжуються, а виконані не повторюються.
+
+    Зображення, призначені карткам, копіюються в images_dir: сховище результатів
+    обмежене за розміром і може видалити файл, на який посилається колода.
+    """
+
+    def __init__(
+        self,
+        state_path: str = "export/.ai_queue.json",
+        max_attempts: int = 3,
+        images_dir: str = "export/ai_artwork",
+    ):
+        self.state_path = state_path
+        self.max_attempts = max_attempts
+        self.images_dir = images_dir
+        self._jobs: Dict[str, GenerationJob] = {}
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """Завантажує стан черги; перервані завдання повертаються в очікування"""
+        if not os.path.exists(self.state_path):
+            return
+
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._jobs = {job["card_name"]: GenerationJob(**job) for job in data.get("jobs", [])}
+        except (OSError, ValueError, TypeError) as e:
+            print(f"[WARN] Пошкоджений стан черги генерації, чергу очищено: {e}")
+            self._jobs = {}
+
+        for job in self._jobs.values():
+            if job.status == RUNNING:
+                job.status = PENDING
+        self._seq = max((job.seq for job in self._jobs.values()), default=0)
+
+    def _save(self):
+        """Атомарно записує стан черги на диск"""
+        data = {"jobs": [asdict(job) for job in self._jobs.values()]}
+
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def enqueue(self, cards: Iterable[Card], priority: int = 0, count: int = 1, only_missing: bool = True) -> int:
+        """Додає завдання для карток колоди; повертає кількість нових або оновлених завдань.
+
+        only_missing - пропускати картки, що вже мають ілюстрацію. Для картки з
+        незавершеним завданням оновлюються лише дані та пріоритет.
+        """
+        added = 0
+        with self._lock:
+            for card in cards:
+                if only_missing and card.image_path and os.path.exists(card.image_path):
+                    continue
+
+                job = self._jobs.get(card.name)
+                if job is not None and job.status == DONE and only_missing and self._has_result(job):
+                    # Результат уже є, його призначить apply_results
+                    continue
+                if job is not None and (job.status != DONE or not self._has_result(job)):
+                    job.card = asdict(card)
+                    job.priority = max(job.priority, priority)
+                    if job.status in (FAILED, DONE):
+                        self._requeue(job)
+                    added += 1
+                    continue
+
+                self._seq += 1
+                self._jobs[card.name] = GenerationJob(
+                    card_name=card.name, card=asdict(card), count=count,
+                    priority=priority, seq=self._seq, updated=time.time(),
+                )
+                added += 1
+
+            self._save()
+        return added
+
+    def next_job(self) -> Optional[GenerationJob]:
+        """Бере завдання з найвищим пріоритетом (за рівності - найдавніше) і позначає його виконуваним"""
+        with self._lock:
+            pending = [job for job in self._jobs.values() if job.status == PENDING]
+            if not pending:
+                return None
+
+            job = min(pending, key=lambda j: (-j.priority, j.seq))
+            job.status = RUNNING
+            job.attempts += 1
+            job.updated = time.time()
+            self._save()
+            return job
+
+    def complete(self, job: GenerationJob, image_paths: List[str]):
+        with self._lock:
+            job.status = DONE
+            job.image_paths = list(image_paths)
+            job.error = None
+            job.updated = time.time()
+            self._save()
+
+    def fail(self, job: GenerationJob, error: str):
+        """Позначає спробу невдалою; після max_attempts завдання більше не повторюється"""
+        with self._lock:
+            job.status = FAILED if job.attempts >= self.max_attempts else PENDING
+            job.error = error
+            job.updated = time.time()
+            self._save()
+
+    def release(self, job: GenerationJob):
+        """Повертає перерване завдання в очікування без зарахування спроби"""
+        with self._lock:
+            job.status = PENDING
+            job.attempts = max(0, job.attempts - 1)
+            job.updated = time.time()
+            self._save()
+
+    @staticmethod
+    def _has_result(job: GenerationJob) -> bool:
+        return bool(job.image_paths) and os.path.exists(job.image_paths[0])
+
+    def _requeue(self, job: GenerationJob):
+        """Повертає завдання в очікування з нуля; сід виводиться з промпту, тож зображення буде тим самим"""
+        job.status, job.attempts, job.error = PENDING, 0, None
+        job.image_paths = []
+        job.updated = time.time()
+
+    def _pin(self, path: str) -> str:
+        """Копіює результат зі сховища в images_dir і повертає шлях до копії"""
+        pinned = os.path.join(self.images_dir, os.path.basename(path))
+        if not os.path.exists(pinned):
+            os.makedirs(self.images_dir, exist_ok=True)
+            tmp_path = f"{pinned}.tmp"
+            shutil.copyfile(path, tmp_path)
+            os.replace(tmp_path, pinned)
+        return pinned
+
+    def apply_results(self, cards: Iterable[Card]) -> int:
+        """Призначає виконані ілюстрації карткам без зображення; повертає кількість оновлених карток.
+
+        Завдання, зображення якого вже видалено зі сховища, повертається в чергу.
+        """
+        updated = 0
+        changed = False
+        with self._lock:
+            for card in cards:
+                job = self._jobs.get(card.name)
+                if job is None or job.status != DONE:
+                    continue
+                if card.image_path and os.path.exists(card.image_path):
+                    continue
+                if not self._has_result(job):
+                    print(f"[WARN] Зображення для картки '{job.card_name}' більше немає, завдання повернуто в чергу")
+                    self._requeue(job)
+                    changed = True
+                    continue
+
+                pinned = self._pin(job.image_paths[0])
+                if pinned != job.image_paths[0]:
+                    job.image_paths[0] = pinned
+                    changed = True
+                if card.image_path != pinned:
+                    card.image_path = pinned
+                    updated += 1
+
+            if changed:
+                self._save()
+        return updated
+
+    def clear_finished(self):
+        """Видаляє виконані завдання з черги"""
+        with self._lock:
+            self._jobs = {name: job for name, job in self._jobs.items() if job.status != DONE}
+            self._save()
+
+    def jobs(self) -> List[GenerationJob]:
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda j: (-j.priority, j.seq))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts = {PENDING: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            counts["total"] = len(self._jobs)
+            return counts
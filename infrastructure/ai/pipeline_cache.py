@@ -0,0 +1,221 @@
+import gc
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import torch
+
+from infrastructure.storage.file_hash import file_hasher
+
+# Компоненти SDXL, які можуть збігатися між чекпойнтами (UNet майже завжди різний)
+SHARED_COMPONENTS = ("vae", "text_encoder", "text_encoder_2")
+
+# Скільки байтів з початку та кінця файлу ваг входить до дешевого відбитка
+SAMPLE_BYTES = 1024 * 1024
+
+PipelineKey = Tuple[str, str, str]
+# Завантажувач отримує вже завантажені спільні компоненти як аргументи from_pretrained
+PipelineLoader = Callable[[Dict[str, Any]], Any]
+
+
+def _module_bytes(module: Any) -> int:
+    """Розмір параметрів та буферів модуля в байтах"""
+    if not isinstance(module, torch.nn.Module):
+        return 0
+    tensors = list(module.parameters()) + list(module.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+def _component_files(model_path: str, component: str, variant: Optional[str] = None) -> Optional[List[str]]:
+    """Файли ваг (з урахуванням варіанта) та конфігурації компонента моделі"""
+    directory = os.path.join(model_path, component)
+    if not os.path.isdir(directory):
+        return None
+
+    names = sorted(os.listdir(directory))
+    weights = [name for name in names if name.endswith(".safetensors")]
+    if variant and any(f".{variant}." in name for name in weights):
+        weights = [name for name in weights if f".{variant}." in name]
+    if not weights:
+        return None
+    return [os.path.join(directory, name) for name in weights + [name for name in names if name == "config.json"]]
+
+
+def component_fingerprint(model_path: str, component: str, variant: Optional[str] = None) -> Optional[str]:
+    """Дешевий відбиток компонента: розміри файлів та їхні перші й останні байти.
+
+    Заголовок safetensors однаковий для всіх ваг однієї архітектури, тому
+    береться ще й кінець файлу. Збіг відбитків лише вказує на кандидата для
+    спільного використання; його підтверджує component_digest.
+    """
+    paths = _component_files(model_path, component, variant)
+    if paths is None:
+        return None
+
+    sha = hashlib.sha256()
+    for path in paths:
+        try:
+            size = os.path.getsize(path)
+            with open(path, 'rb') as f:
+                head = f.read(SAMPLE_BYTES)
+                f.seek(max(0, size - SAMPLE_BYTES))
+                tail = f.read(SAMPLE_BYTES)
+        except OSError:
+            return None
+        sha.update(f"{os.path.basename(path)}:{size}\n".encode("utf-8"))
+        sha.update(head)
+        sha.update(tail)
+    return sha.hexdigest()
+
+
+def component_digest(model_path: str, component: str, variant: Optional[str] = None) -> Optional[str]:
+    """Хеш ваг та конфігурації компонента моделі; однакові хеші означають однакові ваги"""
+    paths = _component_files(model_path, component, variant)
+    if paths is None:
+        return None
+
+    sha = hashlib.sha256()
+    for path in paths:
+        digest = file_hasher.digest(path)
+        if digest is None:
+            return None
+        sha.update(f"{os.path.basename(path)}:{digest}\n".encode("utf-8"))
+    return sha.hexdigest()
+
+
+class PipelineCache:
+    """LRU-кеш завантажених пайплайнів з обмеженням за кількістю та пам'яттю.
+
+    Компоненти з однаковими вагами (VAE, текстові енкодери) завантажуються один раз
+    і використовуються всіма пайплайнами, тож їхня пам'ять враховується лише один раз.
+    Ваги повністю хешуються лише для підтвердження кандидата, знайденого за дешевим
+    відбитком, і лише якщо вже завантажено інший пайплайн з тим самим dtype та пристроєм.
+    """
+
+    def __init__(self, max_pipelines: int = 2, max_bytes: Optional[int] = None):
+        self.max_pipelines = max(1, max_pipelines)
+        self.max_bytes = max_bytes
+        self._pipelines: "OrderedDict[PipelineKey, Any]" = OrderedDict()
+        self._variants: Dict[PipelineKey, Optional[str]] = {}
+        self._lock = threading.RLock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @staticmethod
+    def make_key(model_path: str, dtype: torch.dtype, device: torch.device) -> PipelineKey:
+        return os.path.abspath(model_path), str(dtype), torch.device(device).type
+
+    def get(
+        self,
+        model_path: str,
+        dtype: torch.dtype,
+        device: torch.device,
+        loader: PipelineLoader,
+        variant: Optional[str] = None,
+    ) -> Any:
+        """Повертає пайплайн з кешу або завантажує його через loader"""
+        key = self.make_key(model_path, dtype, device)
+        with self._lock:
+            pipe = self._pipelines.get(key)
+            if pipe is not None:
+                self._pipelines.move_to_end(key)
+                self._hits += 1
+                return pipe
+
+            self._misses += 1
+            shared = self._find_shared(key, variant)
+            if shared:
+                print(f"[INFO] Спільні компоненти з іншої моделі: {', '.join(sorted(shared))}")
+
+            pipe = loader(shared)
+            self._pipelines[key] = pipe
+            self._variants[key] = variant
+            self._evict(keep=key)
+            return pipe
+
+    def _find_shared(self, key: PipelineKey, variant: Optional[str]) -> Dict[str, Any]:
+        """Шукає вже завантажені компоненти з тими самими вагами, dtype та пристроєм"""
+        candidates = [other_key for other_key in self._pipelines if other_key[1:] == key[1:]]
+        if not candidates:
+            # Ділитися нема з ким: ваги не читаються зайвий раз перед завантаженням
+            return {}
+
+        model_path = key[0]
+        shared = {}
+        for component in SHARED_COMPONENTS:
+            fingerprint = component_fingerprint(model_path, component, variant)
+            if fingerprint is None:
+                continue
+
+            for other_key in candidates:
+                module = getattr(self._pipelines[other_key], component, None)
+                if module is None:
+                    continue
+                other_variant = self._variants.get(other_key)
+                if component_fingerprint(other_key[0], component, other_variant) != fingerprint:
+                    continue
+                # Повний хеш лише для підтвердження збігу
+                digest = component_digest(model_path, component, variant)
+                if digest is not None and digest == component_digest(other_key[0], component, other_variant):
+                    shared[component] = module
+                    break
+        return shared
+
+    def memory_bytes(self) -> int:
+        """Пам'ять усіх пайплайнів; спільні компоненти рахуються один раз"""
+        seen = set()
+        total = 0
+        for pipe in self._pipelines.values():
+            for module in getattr(pipe, "components", {}).values():
+                if id(module) in seen:
+                    continue
+                seen.add(id(module))
+                total += _module_bytes(module)
+        return total
+
+    def _evict(self, keep: Hashable):
+        """Вивантажує найдавніше використані пайплайни понад ліміти"""
+        evicted = False
+        while len(self._pipelines) > 1:
+            over_count = len(self._pipelines) > self.max_pipelines
+            over_memory = self.max_bytes is not None and self.memory_bytes() > self.max_bytes
+            if not over_count and not over_memory:
+                break
+
+            oldest = next(iter(self._pipelines))
+            if oldest == keep:
+                break
+            del self._pipelines[oldest]
+            self._variants.pop(oldest, None)
+            self._evictions += 1
+            evicted = True
+            print(f"[INFO] Вивантажено модель з кешу: {oldest[0]}")
+
+        if evicted:
+            gc.collect()
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+
+    def clear(self):
+        """Вивантажує всі пайплайни"""
+        with self._lock:
+            self._pipelines.clear()
+            self._variants.clear()
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "pipelines": len(self._pipelines),
+                "bytes": self.memory_bytes(),
+                "max_pipelines": self.max_pipelines,
+                "max_bytes": self.max_bytes,
+            }
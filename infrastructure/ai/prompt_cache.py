@@ -0,0 +1,62 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+import torch
+
+# (prompt_embeds, pooled_prompt_embeds) для одного тексту
+PromptEmbeddings = Tuple[torch.Tensor, torch.Tensor]
+
+
+class PromptEmbeddingCache:
+    """Обмежений LRU-кеш закодованих промптів за ключем (модель, текст).
+
+    Обидва текстові енкодери SDXL запускаються лише для нового тексту; сталий
+    негативний промпт та повторні промпти беруться з кешу.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[Tuple[Hashable, str], PromptEmbeddings]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, model_key: Hashable, text: str, encoder: Callable[[str], PromptEmbeddings]) -> PromptEmbeddings:
+        """Повертає ембединги тексту, кодуючи його через encoder лише при промаху"""
+        key = (model_key, text)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return cached
+            self._misses += 1
+
+        with torch.no_grad():
+            embeddings = encoder(text)
+
+        with self._lock:
+            self._entries[key] = embeddings
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return embeddings
+
+    def clear(self, model_key: Hashable = None):
+        """Скидає кеш повністю або лише для однієї моделі"""
+        with self._lock:
+            if model_key is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == model_key]:
+                    del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
+
+
+def request_key(params: Dict[str, Any]) -> str:
+    """Ключ результату: хеш усіх параметрів, що визначають зображення"""
+    data = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def model_fingerprint(model_path: str) -> str:
+    """Дешевий відбиток моделі: імена, розміри та час зміни файлів ваг і конфігурацій"""
+    entries = []
+    for root, _, files in os.walk(model_path):
+        for name in files:
+            if not name.endswith((".safetensors", ".bin", ".json")):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append(f"{os.path.relpath(path, model_path)}:{stat.st_size}:{stat.st_mtime_ns}")
+
+    sha = hashlib.sha256(os.path.basename(os.path.normpath(model_path)).encode("utf-8"))
+    for entry in sorted(entries):
+        sha.update(entry.encode("utf-8"))
+    return sha.hexdigest()
+
+
+class ResultStore:
+    """Сховище згенерованих зображень, адресоване вмістом запиту.
+
+    Кожне зображення лежить у файлі з ім'ям за хешем параметрів (модель, промпти,
+    кроки, розмір, guidance, сід, планувальник); параметри зберігаються поруч у JSON
+    та в текстовому блоці PNG, тож будь-яке зображення можна відтворити.
+
+    max_bytes обмежує розмір сховища: понад ліміт видаляються найдавніше
+    використані результати (None - без обмеження).
+    """
+
+    def __init__(self, root: str = "export/ai_results", max_bytes: Optional[int] = None):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._bytes: Optional[int] = None  # Поточний розмір; обчислюється при першому записі
+        self._lock = threading.Lock()
+
+    def _path(self, key: str, ext: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.{ext}")
+
+    def get(self, params: Dict[str, Any]) -> Optional[str]:
+        """Повертає шлях до збереженого результату або None"""
+        path = self._path(request_key(params), "png")
+        try:
+            # Час зміни позначає останнє використання для витіснення
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def put(self, params: Dict[str, Any], image: Image.Image) -> str:
+        """Атомарно зберігає зображення разом з параметрами запиту"""
+        key = request_key(params)
+        path = self._path(key, "png")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        metadata = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+        info = PngInfo()
+        info.add_text("parameters", metadata)
+
+        tmp_path = f"{path}.tmp"
+        image.save(tmp_path, format="PNG", pnginfo=info)
+        os.replace(tmp_path, path)
+
+        with open(self._path(key, "json"), 'w', encoding='utf-8') as f:
+            f.write(metadata)
+
+        if self.max_bytes is not None:
+            self._account(self._entry_size(path))
+        return path
+
+    def _entry_size(self, path: str) -> int:
+        """Розмір результату разом з JSON-файлом параметрів"""
+        size = 0
+        for entry in (path, os.path.splitext(path)[0] + ".json"):
+            try:
+                size += os.path.getsize(entry)
+            except OSError:
+                pass
+        return size
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """Усі результати сховища: (час використання, розмір, шлях до PNG)"""
+        entries = []
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if not name.endswith(".png"):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    mtime = os.path.getmtime(path)
+                except OSError:
+                    continue
+                entries.append((mtime, self._entry_size(path), path))
+        return entries
+
+    def _account(self, added: int):
+        """Враховує новий результат і видаляє найдавніше використані понад max_bytes"""
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = sum(size for _, size, _ in self._entries())
+            else:
+                self._bytes += added
+            if self._bytes <= self.max_bytes:
+                return
+
+            entries = sorted(self._entries())
+            self._bytes = sum(size for _, size, _ in entries)
+            removed = 0
+            # Найновіший результат (щойно записаний) не видаляється
+            for _, size, path in entries[:-1]:
+                if self._bytes <= self.max_bytes:
+                    break
+                for entry in (path, os.path.splitext(path)[0] + ".json"):
+                    try:
+                        os.remove(entry)
+                    except OSError:
+                        pass
+                self._bytes -= size
+                removed += 1
+
+        if removed:
+            print(f"[INFO] Сховище результатів: видалено {removed} найдавніше використаних зображень")
+
+    def parameters(self, path: str) -> Optional[Dict[str, Any]]:
+        """Читає параметри, з якими було згенеровано зображення"""
+        sidecar = os.path.splitext(path)[0] + ".json"
+        try:
+            with open(sidecar, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
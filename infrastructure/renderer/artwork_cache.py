@@ -0,0 +1,96 @@
+import os
+from typing import Dict, Optional, Tuple
+
+from PIL import Image, features
+
+from infrastructure.renderer.asset_cache import AssetCache
+from infrastructure.storage.file_hash import file_hasher
+
+
+class ArtworkCache:
+    """Кеш ілюстрацій, попередньо масштабованих під розмір блоку шаблону.
+
+    Мініатюри зберігаються у пам'яті та на диску за ключем (хеш вмісту, розмір),
+    тож повторні рендери та попередній перегляд не декодують повнорозмірне зображення.
+    """
+
+    def __init__(self, cache_dir: str = "export/.art_cache", max_bytes: int = 128 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.memory = AssetCache(max_bytes)
+        # WebP без втрат компактніший за PNG; якщо Pillow зібрано без WebP, використовуємо PNG
+        self.extension = "webp" if features.check("webp") else "png"
+
+        # Лічильники для діагностики
+        self.disk_hits = 0
+        self.source_decodes = 0
+
+    def get(self, path: str, size: Tuple[int, int]) -> Optional[Image.Image]:
+        """Повертає RGBA-ілюстрацію заданого розміру або None, якщо файлу немає.
+
+        Повернуте зображення спільне для всіх викликів, тому його не можна змінювати.
+        """
+        digest = file_hasher.digest(path)
+        if digest is None:
+            return None
+
+        size = (int(size[0]), int(size[1]))
+        return self.memory.lookup((digest, size), lambda: self._load(path, digest, size))
+
+    def _cache_path(self, digest: str, size: Tuple[int, int]) -> str:
+        return os.path.join(self.cache_dir, f"{digest}_{size[0]}x{size[1]}.{self.extension}")
+
+    def _load(self, path: str, digest: str, size: Tuple[int, int]) -> Image.Image:
+        """Читає мініатюру з диска або будує її з оригіналу"""
+        cache_path = self._cache_path(digest, size)
+        if os.path.exists(cache_path):
+            try:
+                with Image.open(cache_path) as cached:
+                    image = cached.convert("RGBA")
+                self.disk_hits += 1
+                return image
+            except OSError:
+                pass  # Пошкоджений файл кешу буде перезаписано
+
+        image = self._decode_scaled(path, size)
+        self._store(cache_path, image)
+        return image
+
+    def _decode_scaled(self, path: str, size: Tuple[int, int]) -> Image.Image:
+        """Декодує оригінал у зменшеній роздільності та масштабує до цільового розміру"""
+        self.source_decodes += 1
+
+        with Image.open(path) as source:
+            # JPEG можна декодувати одразу у зменшеному масштабі (1/2, 1/4, 1/8)
+            if source.format == "JPEG":
+                source.draft("RGB", size)
+
+            image = source.convert("RGBA")
+
+        # Цілочисельне зменшення значно дешевше за повне передискретизування
+        factor = min(image.width // size[0], image.height // size[1])
+        if factor >= 2:
+            image = image.reduce(factor)
+
+        if image.size != size:
+            image = image.resize(size)
+
+        return image
+
+    def _store(self, cache_path: str, image: Image.Image):
+        """Атомарно записує мініатюру на диск"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            if self.extension == "webp":
+                image.save(tmp_path, format="WEBP", lossless=True)
+            else:
+                image.save(tmp_path, format="PNG")
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"[WARN] Не вдалося зберегти мініатюру ілюстрації: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """Повертає статистику використання кешу"""
+        stats = self.memory.stats()
+        stats.update({"disk_hits": self.disk_hits, "source_decodes": self.source_decodes})
+        return stats
@@ -0,0 +1,102 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from PIL import Image
+
+
+class AssetCache:
+    """LRU-кеш декодованих ресурсів рендерера (рамки, іконки) з обмеженням за обсягом пам'яті"""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Image.Image]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._current_bytes = 0
+        self._lock = threading.Lock()
+
+        # Лічильники для діагностики
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path: str, size: Tuple[int, int]) -> Optional[Image.Image]:
+        """Повертає RGBA-зображення заданого розміру або None, якщо файлу немає.
+
+        Повернуте зображення спільне для всіх викликів, тому його не можна змінювати.
+        """
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+        size = (int(size[0]), int(size[1]))
+        key = (os.path.abspath(path), mtime, size)
+        return self.lookup(key, lambda: self._load(path, size))
+
+    def lookup(self, key: Hashable, loader: Callable[[], Optional[Image.Image]]) -> Optional[Image.Image]:
+        """Повертає зображення за довільним ключем, завантажуючи його через loader при промаху"""
+        with self._lock:
+            image = self._entries.get(key)
+            if image is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return image
+            self.misses += 1
+
+        image = loader()
+        if image is not None:
+            self._put(key, image)
+        return image
+
+    def _load(self, path: str, size: Tuple[int, int]) -> Image.Image:
+        """Декодує, конвертує та масштабує ресурс"""
+        with Image.open(path) as source:
+            image = source.convert("RGBA")
+
+        if image.size != size:
+            image = image.resize(size)
+
+        return image
+
+    def _put(self, key: Hashable, image: Image.Image):
+        """Додає зображення до кешу, витісняючи найдавніші записи"""
+        nbytes = image.width * image.height * len(image.getbands())
+        if nbytes > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                return
+
+            self._entries[key] = image
+            self._sizes[key] = nbytes
+            self._current_bytes += nbytes
+
+            while self._current_bytes > self.max_bytes:
+                old_key, _ = self._entries.popitem(last=False)
+                self._current_bytes -= self._sizes.pop(old_key)
+                self.evictions += 1
+
+    def clear(self):
+        """Очищує кеш та лічильники"""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._current_bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Повертає статистику використання кешу"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._current_bytes,
+                "max_bytes": self.max_bytes,
+            }
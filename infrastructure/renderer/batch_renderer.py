@@ -0,0 +1,163 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from core.models.card import Card
+from infrastructure.renderer.artwork_cache import ArtworkCache
+from infrastructure.renderer.card_renderer import CardRenderer
+
+# Рендерер робочого процесу, створюється один раз при старті процесу
+_worker_renderer: Optional[CardRenderer] = None
+
+
+@dataclass
+class RenderResult:
+    index: int
+    card_name: str
+    path: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+RenderJob = Tuple[int, Card, str]
+ProgressCallback = Callable[[int, int, RenderResult], None]
+
+
+def _init_worker(renderer_config: Dict[str, Any]):
+    """Ініціалізує робочий процес: завантажує шрифти та створює рендерер з налаштуваннями батьківського"""
+    global _worker_renderer
+    config = dict(renderer_config)
+    artwork_cache = ArtworkCache(config.pop("artwork_cache_dir"))
+    _worker_renderer = CardRenderer(artwork_cache=artwork_cache, **config)
+    # Прогріваємо план шаблону за замовчуванням разом зі шрифтами
+    _worker_renderer.get_plan()
+
+
+def _render_chunk(
+    jobs: Sequence[RenderJob], template_path: Optional[str], language: Optional[str]
+) -> List[RenderResult]:
+    """Рендерить пакет карток у робочому процесі та зберігає їх на диск"""
+    results = []
+    for index, card, output_path in jobs:
+        try:
+            image = _worker_renderer.render(card, template_path, language)
+            image.save(output_path)
+            results.append(RenderResult(index, card.name, path=output_path))
+        except Exception as e:
+            results.append(RenderResult(index, card.name, error=str(e)))
+    return results
+
+
+class BatchRenderer:
+    """Паралельний рендеринг карток у пулі процесів"""
+
+    def __init__(self, renderer_config: Optional[Dict[str, Any]] = None, workers: Optional[int] = None):
+        # Робочі процеси мають рендерити так само, як рендерер, що їх запускає
+        self.renderer_config = renderer_config or CardRenderer().worker_config()
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Пул живе між викликами, щоб не прогрівати рендерери повторно.
+        # spawn: fork з GUI-процесу (Qt, потоки) копіює чужі блокування та стан
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.renderer_config,),
+            )
+        return self._executor
+
+    def _chunk_size(self, total: int) -> int:
+        # Кілька пакетів на процес: баланс між накладними витратами IPC та рівномірністю навантаження
+        return max(1, min(32, total // (self.workers * 4)))
+
+    def render(
+        self,
+        jobs: Sequence[Tuple[Card, str]],
+        template_path: Optional[str] = None,
+        progress_callback: Optional[ProgressCallback] = None,
+        language: Optional[str] = None,
+    ) -> List[RenderResult]:
+        """Рендерить пари (картка, шлях виводу); результати повертаються у порядку вхідних карток"""
+        total = len(jobs)
+        if total == 0:
+            return []
+
+        indexed = [(i, card, path) for i, (card, path) in enumerate(jobs)]
+        size = self._chunk_size(total)
+        chunks = [indexed[i:i + size] for i in range(0, total, size)]
+
+        results: List[Optional[RenderResult]] = [None] * total
+        done = 0
+        remaining = chunks
+        # Якщо робочий процес падає, пул стає непридатним: пакети повторюються один раз у новому пулі
+        for attempt in range(2):
+            broken = []
+            executor = self._get_executor()
+            futures = {}
+            for chunk in remaining:
+                try:
+                    futures[executor.submit(_render_chunk, chunk, template_path, language)] = chunk
+                except BrokenProcessPool:
+                    broken.append(chunk)
+
+            for future in as_completed(futures):
+                try:
+                    chunk_results = future.result()
+                except BrokenProcessPool:
+                    broken.append(futures[future])
+                    continue
+                except Exception as e:
+                    # Помилка пакета позначає помилкою всі його картки
+                    chunk_results = [RenderResult(i, card.name, error=str(e)) for i, card, _ in futures[future]]
+
+                for result in chunk_results:
+                    results[result.index] = result
+                    done += 1
+                    if progress_callback:
+                        progress_callback(done, total, result)
+
+            if not broken:
+                break
+
+            self._reset()
+            if attempt == 0:
+                print(f"[WARN] Пул рендерингу впав, повторюємо {len(broken)} пакетів у новому пулі")
+                remaining = broken
+                continue
+
+            for chunk in broken:
+                for i, card, _ in chunk:
+                    result = RenderResult(i, card.name, error="Робочий процес рендерингу завершився аварійно")
+                    results[i] = result
+                    done += 1
+                    if progress_callback:
+                        progress_callback(done, total, result)
+
+        return results
+
+    def _reset(self):
+        """Відкидає зламаний пул; наступний виклик створить новий"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def close(self):
+        """Зупиняє пул процесів"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
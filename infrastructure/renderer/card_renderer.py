@@ -1,135 +1,474 @@
-
 import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
 from PIL import Image, ImageDraw, ImageFont
-from typing import Dict, Any, Optional
+from typing import Dict, Any, FrozenSet, List, Optional, Tuple
 from core.models.card import Card
+from core.repositories.template_repository import TemplateRepository
+from infrastructure.renderer.artwork_cache import ArtworkCache
+from infrastructure.renderer.asset_cache import AssetCache
+from infrastructure.renderer.font_registry import FontRegistry, get_font_registry
+from infrastructure.renderer.render_plan import PlanItem, RenderPlan, compile_template
+from infrastructure.renderer.text_layout import TextLayoutEngine
+from infrastructure.storage.file_hash import file_hasher
+
+# Відповідність ключів статів у шаблоні до підписів та полів CardStats
+STAT_FIELDS = {
+    "atk": ("ATK", "atk"),
+    "def": ("DEF", "defense"),
+    "stb": ("STB", "stb"),
+    "init": ("INIT", "init"),
+    "rng": ("RNG", "rng"),
+    "move": ("MOVE", "move"),
+}
+
+# Елементи шаблону, вміст яких змінюється від картки до картки
+DYNAMIC_ITEMS = {"artwork", "title", "description", "cost", "cost_type"}
+# Скільки символів значення стату резервується при перевірці перекриття зі статичними елементами
+STAT_VALUE_CHARS = 4
+
+# Область на картці: (ліво, верх, право, низ)
+Box = Tuple[int, int, int, int]
+
+
+def _overlaps(a: Box, b: Box) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def _line_height(item: PlanItem) -> int:
+    """Висота рядка тексту елемента"""
+    if item.font is None:
+        return item.font_size * 2
+    ascent, descent = item.font.getmetrics()
+    return ascent + descent
+
+
+@dataclass
+class StaticLayer:
+    image: Image.Image
+    # Зсув значення стату відносно позиції елемента (після іконки або підпису)
+    value_offsets: Dict[str, int]
+    # Індекси статичних елементів, що перекриваються з нижчими динамічними і малюються для кожної картки
+    deferred: FrozenSet[int]
+
 
 class CardRenderer:
-    def __init__(self, assets_dir: str = "resources/assets"):
+    # Змінюйте при кожній зміні результату рендерингу, щоб скинути кеш рендерів
+    VERSION = "5"
+
+    def __init__(
+        self,
+        assets_dir: str = "resources/assets",
+        asset_cache: Optional[AssetCache] = None,
+        templates_dir: str = "resources/templates",
+        locales_dir: str = "resources/locales",
+        language: str = "uk",
+        artwork_cache: Optional[ArtworkCache] = None,
+        font_registry: Optional[FontRegistry] = None,
+        max_layers: int = 32,
+    ):
         self.assets_dir = assets_dir
         self.fonts_dir = os.path.join(assets_dir, "fonts")
         self.icons_dir = os.path.join(assets_dir, "icons")
         self.frames_dir = os.path.join(assets_dir, "frames")
+        self.templates_dir = templates_dir
+        self.locales_dir = locales_dir
+        self.language = language
+
+        # Кеш декодованих рамок та іконок
+        self.asset_cache = asset_cache or AssetCache()
+
+        # Кеш попередньо масштабованих ілюстрацій
+        self.artwork_cache = artwork_cache or ArtworkCache()
+
+        # Скомпільовані плани рендерингу за (шлях шаблону, mtime, масштаб)
+        self._plans: Dict[Tuple[str, int, float], RenderPlan] = {}
+        self._plans_lock = threading.Lock()
+
+        # LRU статичних шарів за (план, тип картки, мова): кожен шар - повнорозмірне зображення
+        self.max_layers = max(1, max_layers)
+        self._layers: "OrderedDict[Tuple[RenderPlan, str, str, int], StaticLayer]" = OrderedDict()
+        self._layers_lock = threading.Lock()
+
+        # Локалізовані назви типів за мовою: (mtime файлу локалі, назви)
+        self._type_names: Dict[str, Tuple[int, Dict[str, str]]] = {}
+        self._type_names_lock = threading.Lock()
+
+        # Шрифти спільні для всіх рендерерів процесу
+        self.fonts = font_registry or get_font_registry(self.fonts_dir)
 
-        # Завантажуємо шрифти
-        self._load_fonts()
+        # Перенесення тексту з кешем розкладок та вимірювань
+        self.text_layout = TextLayoutEngine(self._get_font)
 
-    def _load_fonts(self):
-        """Завантажує шрифти"""
-        font_path = os.path.join(self.fonts_dir, "LS_font.ttf")
+    def worker_config(self) -> Dict[str, Any]:
+        """Параметри для створення рівноцінного рендерера в іншому процесі"""
+        return {
+            "assets_dir": self.assets_dir,
+            "templates_dir": self.templates_dir,
+            "locales_dir": self.locales_dir,
+            "language": self.language,
+            "artwork_cache_dir": self.artwork_cache.cache_dir,
+        }
+
+    def _get_font(self, family: str, size: int, bold: bool = False) -> ImageFont.ImageFont:
+        """Повертає шрифт заданого розміру"""
+        return self.fonts.get(family, size, bold)
+
+    def _resolve_template_path(self, template_path: Optional[str]) -> str:
+        """Повертає шлях до файлу шаблону (за замовчуванням - default.json)"""
+        if not template_path:
+            return os.path.join(self.templates_dir, "default.json")
 
-        def load_font(size: int):
-            # Use bundled font if available, otherwise fall back to Pillow's default DejaVu
-            if os.path.exists(font_path):
-                return ImageFont.truetype(font_path, size)
+        if not os.path.exists(template_path) and not template_path.endswith(".json"):
+            # Дозволяємо передавати назву шаблону замість шляху
+            return os.path.join(self.templates_dir, f"{template_path}.json")
 
-            try:
-                return ImageFont.truetype("DejaVuSans.ttf", size)
-            except Exception:
-                return ImageFont.load_default()
+        return template_path
+
+    def get_plan(self, template_path: Optional[str] = None, scale: float = 1.0) -> RenderPlan:
+        """Повертає скомпільований план рендерингу для шаблону у заданому масштабі"""
+        path = os.path.abspath(self._resolve_template_path(template_path))
 
         try:
-            self.font_title = load_font(48)
-            self.font_desc = load_font(32)
-            self.font_stats = load_font(40)
-        except Exception as e:
-            print(f"Помилка завантаження шрифтів: {e}")
-            # Використовуємо шрифт за замовчуванням
-            self.font_title = ImageFont.load_default()
-            self.font_desc = ImageFont.load_default()
-            self.font_stats = ImageFont.load_default()
-
-    def render(self, card: Card, template_path: Optional[str] = None) -> Image.Image:
-        """Рендерить картку"""
-        # Розміри полотна
-        width, height = 744, 1038
-
-        # Створюємо полотно
-        card = Image.new("RGBA", (width, height), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(card)
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = -1
+
+        key = (path, mtime, float(scale))
+        with self._plans_lock:
+            plan = self._plans.get(key)
+        if plan is not None:
+            return plan
+
+        if mtime >= 0:
+            with open(path, 'r', encoding='utf-8') as f:
+                template = json.load(f)
+        else:
+            template = TemplateRepository().create_default_template()
+
+        plan = self.compile_plan(template, scale)
+        with self._plans_lock:
+            self._plans[key] = plan
+        return plan
+
+    def resolve_scale(
+        self, template_path: Optional[str] = None, scale: Optional[float] = None, dpi: Optional[int] = None
+    ) -> float:
+        """Обчислює масштаб рендерингу з явного масштабу або цільової роздільності (DPI шаблону = 1.0)"""
+        if dpi:
+            return float(dpi) / self.get_plan(template_path).dpi
+        return float(scale or 1.0)
+
+    def fingerprint(self, template_path: Optional[str] = None, scale: float = 1.0, language: Optional[str] = None) -> str:
+        """Повертає відбиток спільних вхідних даних: версії рендерера, шаблону, локалі, шрифту та ресурсів"""
+        parts = [
+            self.VERSION,
+            repr(float(scale)),
+            file_hasher.digest(self._resolve_template_path(template_path)) or "default",
+            # Локалізовані назви типів запікаються в рендер
+            file_hasher.digest(self._locale_path(language or self.language)) or "no-locale",
+            self.fonts.resolve_path() or "",
+        ]
+
+        for directory in (self.fonts_dir, self.frames_dir, self.icons_dir):
+            if os.path.isdir(directory):
+                for name in sorted(os.listdir(directory)):
+                    path = os.path.join(directory, name)
+                    if os.path.isfile(path):
+                        parts.append(f"{name}:{file_hasher.digest(path)}")
+
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+    def compile_plan(self, template: Dict[str, Any], scale: float = 1.0) -> RenderPlan:
+        """Компілює шаблон у план рендерингу"""
+        return compile_template(template, self._get_font, scale)
+
+    def render(
+        self,
+        card: Card,
+        template_path: Optional[str] = None,
+        language: Optional[str] = None,
+        scale: Optional[float] = None,
+        dpi: Optional[int] = None,
+    ) -> Image.Image:
+        """Рендерить картку у масштабі scale або у роздільності dpi (за замовчуванням - розмір шаблону)"""
+        plan = self.get_plan(template_path, self.resolve_scale(template_path, scale, dpi))
+        language = language or self.language
+        layer = self.get_static_layer(plan, card.type, language)
+
+        # Копіюємо попередньо скомпонований статичний шар
+        canvas = layer.image.copy()
+        draw = ImageDraw.Draw(canvas)
+        value_offsets = dict(layer.value_offsets)
+
+        # Динамічні елементи у порядку z; статичні, що лежать поверх динамічних,
+        # малюються тут, щоб не опинитися під ілюстрацією чи полями картки
+        for index, item in enumerate(plan.items):
+            if index in layer.deferred:
+                self._draw_static_item(canvas, draw, item, card.type, language, value_offsets, plan.scale)
+            self._draw_dynamic_item(canvas, draw, item, card, value_offsets)
+
+        return canvas
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """Повертає статистику кешів ресурсів, ілюстрацій та розкладки тексту"""
+        return {
+            "assets": self.asset_cache.stats(),
+            "artwork": self.artwork_cache.stats(),
+            "text": self.text_layout.stats(),
+        }
+
+    def get_static_layer(self, plan: RenderPlan, card_type: str, language: str) -> StaticLayer:
+        """Повертає статичний шар для (шаблон, тип картки, мова), будуючи його за потреби"""
+        # Час зміни локалі в ключі: назва типу запікається в шар
+        key = (plan, card_type, language, self._locale_mtime(language))
+        with self._layers_lock:
+            layer = self._layers.get(key)
+            if layer is not None:
+                self._layers.move_to_end(key)
+                return layer
+
+        layer = self._build_static_layer(plan, card_type, language)
+        with self._layers_lock:
+            self._layers[key] = layer
+            # Шари змінених шаблонів більше не запитуються і витісняються першими
+            while len(self._layers) > self.max_layers:
+                self._layers.popitem(last=False)
+        return layer
+
+    def _build_static_layer(self, plan: RenderPlan, card_type: str, language: str) -> StaticLayer:
+        """Компонує фон, рамку та незмінні підписи шаблону.
+
+        Статичний елемент запікається, якщо його не перекриває жоден елемент, що
+        в порядку шаблону лежить під ним і малюється для кожної картки. Інакше він
+        малюється разом з динамічними, щоб зберегти порядок z.
+        """
+        canvas = Image.new("RGBA", (plan.width, plan.height), plan.background)
+        draw = ImageDraw.Draw(canvas)
+        value_offsets: Dict[str, int] = {}
 
         # Додаємо рамку, якщо вона є
-        self._draw_frame(card)
+        self._draw_frame(canvas)
+
+        deferred = set()
+        # Області елементів, що малюються для кожної картки, у порядку шаблону
+        per_card: List[Box] = []
+        # Зсуви значень усіх статів, зокрема тих, чиї підписи не запікаються
+        all_offsets: Dict[str, int] = {}
+        for index, item in enumerate(plan.items):
+            box = self._static_box(plan, item, card_type, language, all_offsets)
+            if box is not None:
+                if any(_overlaps(box, other) for other in per_card):
+                    deferred.add(index)
+                    per_card.append(box)
+                else:
+                    self._draw_static_item(canvas, draw, item, card_type, language, value_offsets, plan.scale)
+
+            box = self._dynamic_box(draw, plan, item, card_type, all_offsets)
+            if box is not None:
+                per_card.append(box)
+
+        return StaticLayer(canvas, value_offsets, frozenset(deferred))
+
+    def _static_box(
+        self, plan: RenderPlan, item: PlanItem, card_type: str, language: str, value_offsets: Dict[str, int]
+    ) -> Optional[Box]:
+        """Фактична область незмінної частини елемента (None - елемент нічого не малює)"""
+        scratch = Image.new("RGBA", (plan.width, plan.height), (0, 0, 0, 0))
+        self._draw_static_item(scratch, ImageDraw.Draw(scratch), item, card_type, language, value_offsets, plan.scale)
+        return scratch.getchannel("A").getbbox()
+
+    def _dynamic_box(
+        self, draw: ImageDraw.Draw, plan: RenderPlan, item: PlanItem, card_type: str, value_offsets: Dict[str, int]
+    ) -> Optional[Box]:
+        """Найбільша область, яку може зайняти динамічна частина елемента для будь-якої картки"""
+        if item.name.startswith("stat_"):
+            if card_type != "unit" or item.name not in value_offsets:
+                return None
+            # Значення стату - коротке число поруч з підписом
+            left = item.x + value_offsets[item.name]
+            right = left + int(draw.textlength("0" * STAT_VALUE_CHARS, font=item.font)) + 1
+            return left, item.y, right, item.y + _line_height(item)
+
+        if item.name not in DYNAMIC_ITEMS:
+            return None
+
+        if item.kind == "image":
+            width = item.width or plan.width - item.x
+            height = item.height or plan.height - item.y
+            return item.x, item.y, item.x + width, item.y + height
+
+        # Текст без ширини блоку не переноситься, але може сягати правого краю
+        right = item.x + item.width if item.width is not None else plan.width
+        if item.width is not None and item.height is None:
+            bottom = plan.height
+        else:
+            bottom = item.y + (item.height or _line_height(item))
+        return item.x, item.y, right, bottom
+
+    def _draw_static_item(
+        self,
+        canvas: Image.Image,
+        draw: ImageDraw.Draw,
+        item: PlanItem,
+        card_type: str,
+        language: str,
+        value_offsets: Dict[str, int],
+        scale: float,
+    ):
+        """Малює незмінну частину елемента: підпис, іконку стату або назву типу"""
+        if item.kind != "text" or item.name in DYNAMIC_ITEMS:
+            return
+
+        if item.name.startswith("stat_"):
+            if card_type == "unit":
+                self._draw_stat_label(canvas, draw, item, value_offsets, scale)
+            return
+
+        text = self._type_label(card_type, language) if item.name == "type" else item.text
+        if text:
+            draw.text((item.x, item.y), text, font=item.font, fill=item.color)
 
-        # Додаємо зображення, якщо воно є
-        self._draw_image(card, draw)
+    def _locale_path(self, language: str) -> str:
+        return os.path.join(self.locales_dir, f"{language}.json")
 
-        # Додаємо текстові елементи
-        self._draw_title(card, draw)
-        self._draw_description(card, draw)
+    def _locale_mtime(self, language: str) -> int:
+        try:
+            return os.stat(self._locale_path(language)).st_mtime_ns
+        except OSError:
+            return -1
+
+    def _type_label(self, card_type: str, language: str) -> str:
+        """Повертає локалізовану назву типу картки"""
+        locale_file = self._locale_path(language)
+        mtime = self._locale_mtime(language)
 
-        # Додаємо стати, якщо це юніт
-        if card.is_unit() and card.stats:
-            self._draw_stats(card, draw)
+        with self._type_names_lock:
+            cached = self._type_names.get(language)
+            if cached is not None and cached[0] == mtime:
+                names = cached[1]
+            else:
+                # Файл локалі змінився або ще не читався
+                names = {}
+                if mtime >= 0:
+                    with open(locale_file, 'r', encoding='utf-8') as f:
+                        names = json.load(f).get("card_type", {})
+                self._type_names[language] = (mtime, names)
 
-        return card
+        return names.get(card_type, card_type).upper()
 
-    def _draw_frame(self, card: Image.Image):
+    def _draw_frame(self, canvas: Image.Image):
         """Додає рамку до картки"""
         frame_path = os.path.join(self.frames_dir, "base_frame.png")
-        if os.path.exists(frame_path):
-            frame = Image.open(frame_path).convert("RGBA")
-            frame = frame.resize((card.width, card.height))
-            card.alpha_composite(frame, (0, 0))
+        frame = self.asset_cache.get(frame_path, canvas.size)
+        if frame is not None:
+            canvas.alpha_composite(frame, (0, 0))
+
+    def _draw_dynamic_item(
+        self, canvas: Image.Image, draw: ImageDraw.Draw, item: PlanItem, card: Card, value_offsets: Dict[str, int]
+    ):
+        """Малює елемент шаблону, що залежить від даних картки"""
+        if item.kind == "image":
+            if item.name == "artwork":
+                self._draw_image(canvas, item, card)
+            return
+
+        if item.name.startswith("stat_"):
+            if card.is_unit() and card.stats and item.name in value_offsets:
+                self._draw_stat_value(draw, item, card, value_offsets[item.name])
+            return
+
+        if item.name not in DYNAMIC_ITEMS:
+            return
+
+        text = self._item_text(item, card)
+        if text:
+            self._draw_text(draw, item, text)
 
-    def _draw_image(self, card: Card, draw: ImageDraw.Draw):
+    def _draw_text(self, draw: ImageDraw.Draw, item: PlanItem, text: str):
+        """Малює текст елемента, переносячи його за шириною блоку, якщо вона задана"""
+        if item.width is None:
+            draw.text((item.x, item.y), text, font=item.font, fill=item.color)
+            return
+
+        layout = self.text_layout.layout(
+            text,
+            item.font_family,
+            item.font_size,
+            item.font_bold,
+            item.width,
+            item.height,
+            item.min_font_size,
+        )
+        y = item.y
+        for line in layout.lines:
+            draw.text((item.x, y), line, font=layout.font, fill=item.color)
+            y += layout.line_height
+
+    def _item_text(self, item: PlanItem, card: Card) -> str:
+        """Повертає текст динамічного елемента шаблону для картки"""
+        if item.name == "title":
+            return card.name
+        if item.name == "description":
+            return card.description
+        if item.name == "cost":
+            return str(card.cost)
+        if item.name == "cost_type":
+            return card.cost_type
+        return ""
+
+    def _draw_image(self, canvas: Image.Image, item: PlanItem, card: Card):
         """Додає зображення до картки"""
-        if card.image_path and os.path.exists(card.image_path):
-            art = Image.open(card.image_path).convert("RGBA")
-
-            # Розміщення та розмір зображення
-            x, y, w, h = 112, 150, 520, 320
-            art = art.resize((w, h))
-            card.alpha_composite(art, (x, y))
-
-    def _draw_title(self, card: Card, draw: ImageDraw.Draw):
-        """Додає заголовок до картки"""
-        if card.name:
-            x, y = 60, 40
-            draw.text((x, y), card.name, font=self.font_title, fill=(255, 255, 255, 255))
-
-    def _draw_description(self, card: Card, draw: ImageDraw.Draw):
-        """Додає опис до картки"""
-        if card.description:
-            x, y = 60, 520
-            draw.text((x, y), card.description, font=self.font_desc, fill=(220, 220, 220, 255))
-
-    def _draw_stats(self, card: Card, draw: ImageDraw.Draw):
-        """Додає стати до картки"""
-        if not card.stats:
+        if not card.image_path:
             return
 
-        # Позиції для статів
-        stat_positions = {
-            "ATK": (80, 740),
-            "DEF": (80, 780),
-            "STB": (80, 820),
-            "INIT": (380, 740),
-            "RNG": (380, 780),
-            "MOVE": (380, 820)
-        }
+        # Розміщення та розмір зображення
+        w = item.width or canvas.width - item.x
+        h = item.height or canvas.height - item.y
+        art = self.artwork_cache.get(card.image_path, (w, h))
+        if art is None:
+            return
 
-        stats = [
-            ("ATK", card.stats.atk),
-            ("DEF", card.stats.defense),
-            ("STB", card.stats.stb),
-            ("INIT", card.stats.init),
-            ("RNG", card.stats.rng),
-            ("MOVE", card.stats.move)
-        ]
+        if item.opacity < 1.0:
+            # Мініатюра спільна для всіх рендерів, тому змінюємо лише копію
+            art = art.copy()
+            alpha = art.getchannel("A").point(lambda a: int(a * item.opacity))
+            art.putalpha(alpha)
 
-        for stat_name, stat_value in stats:
-            if stat_name not in stat_positions:
-                continue
+        canvas.alpha_composite(art, (item.x, item.y))
+
+    def _draw_stat_label(
+        self,
+        canvas: Image.Image,
+        draw: ImageDraw.Draw,
+        item: PlanItem,
+        value_offsets: Dict[str, int],
+        scale: float = 1.0,
+    ):
+        """Малює іконку або підпис стату та запам'ятовує позицію значення"""
+        key = item.name[len("stat_"):]
+        if key not in STAT_FIELDS:
+            return
 
-            x, y = stat_positions[stat_name]
+        label, _ = STAT_FIELDS[key]
 
-            # Малюємо іконку, якщо вона є
-            icon_path = os.path.join(self.icons_dir, f"{stat_name.lower()}.png")
-            if os.path.exists(icon_path):
-                icon = Image.open(icon_path).convert("RGBA")
-                icon = icon.resize((30, 30))
-                card.alpha_composite(icon, (x, y))
+        # Малюємо іконку, якщо вона є, інакше текстовий підпис
+        gap = max(1, int(round(10 * scale)))
+        icon_size = item.font_size + gap
+        icon_path = os.path.join(self.icons_dir, f"{label.lower()}.png")
+        icon = self.asset_cache.get(icon_path, (icon_size, icon_size))
+        if icon is not None:
+            canvas.alpha_composite(icon, (item.x, item.y))
+            value_offsets[item.name] = icon_size + gap
+        else:
+            draw.text((item.x, item.y), label, font=item.font, fill=item.color)
+            value_offsets[item.name] = int(round(draw.textlength(f"{label} ", font=item.font)))
 
-            # Малюємо значення
-            draw.text((x + 40, y), str(stat_value), font=self.font_stats, fill=(255, 255, 255, 255))
+    def _draw_stat_value(self, draw: ImageDraw.Draw, item: PlanItem, card: Card, offset: int):
+        """Малює значення стату поруч із підписом"""
+        _, field = STAT_FIELDS[item.name[len("stat_"):]]
+        value = getattr(card.stats, field)
+        draw.text((item.x + offset, item.y), str(value), font=item.font, fill=item.color)
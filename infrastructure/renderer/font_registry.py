@@ -0,0 +1,116 @@
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from PIL import ImageFont
+
+# Шрифт карток за замовчуванням та системний запасний варіант Pillow
+DEFAULT_FONT = "LS_font"
+FALLBACK_FONT = "DejaVuSans"
+
+
+class FontRegistry:
+    """Спільний для процесу реєстр шрифтів: кожна комбінація (файл, розмір, варіант) завантажується один раз"""
+
+    def __init__(self, fonts_dir: str = "resources/assets/fonts"):
+        self.fonts_dir = fonts_dir
+        self._fonts: Dict[Tuple[str, int, bool], ImageFont.ImageFont] = {}
+        self._paths: Dict[Tuple[str, bool], Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, family: str, size: int, bold: bool = False) -> ImageFont.ImageFont:
+        """Повертає шрифт сімейства family заданого розміру та накреслення"""
+        with self._lock:
+            path = self._resolve(family, bold)
+            key = (path or "", size, bold)
+
+            font = self._fonts.get(key)
+            if font is None:
+                font = self._load(path, size, bold)
+                self._fonts[key] = font
+
+        return font
+
+    def resolve_path(self, family: str = "", bold: bool = False) -> Optional[str]:
+        """Повертає шлях до файлу шрифту, який буде використано для сімейства"""
+        with self._lock:
+            return self._resolve(family, bold)
+
+    def _resolve(self, family: str, bold: bool) -> Optional[str]:
+        """Шукає файл шрифту: сімейство з шаблону, шрифт карток, DejaVu"""
+        key = (family, bold)
+        if key in self._paths:
+            return self._paths[key]
+
+        path = None
+        for name in self._candidates(family, bold):
+            local = os.path.join(self.fonts_dir, f"{name}.ttf")
+            if os.path.exists(local):
+                path = local
+                break
+
+        if path is None:
+            # Pillow шукає DejaVu серед системних шрифтів
+            fallback = f"{FALLBACK_FONT}-Bold.ttf" if bold else f"{FALLBACK_FONT}.ttf"
+            for name in (fallback, f"{FALLBACK_FONT}.ttf"):
+                try:
+                    ImageFont.truetype(name, 10)
+                    path = name
+                    break
+                except OSError:
+                    continue
+
+        self._paths[key] = path
+        return path
+
+    def _candidates(self, family: str, bold: bool) -> List[str]:
+        names = []
+        for base in (family, DEFAULT_FONT):
+            if not base:
+                continue
+            if bold:
+                names.extend([f"{base}-Bold", f"{base}_Bold"])
+            names.extend([base, f"{base}-Regular"])
+        return names
+
+    def _load(self, path: Optional[str], size: int, bold: bool) -> ImageFont.ImageFont:
+        """Завантажує шрифт з файлу"""
+        if path is None:
+            return ImageFont.load_default()
+
+        try:
+            font = ImageFont.truetype(path, size)
+        except Exception as e:
+            print(f"Помилка завантаження шрифтів: {e}")
+            # Використовуємо шрифт за замовчуванням
+            return ImageFont.load_default()
+
+        if bold and "bold" not in os.path.basename(path).lower():
+            # Змінні шрифти можуть містити жирне накреслення всередині одного файлу
+            try:
+                font.set_variation_by_name("Bold")
+            except Exception:
+                pass
+
+        return font
+
+    def clear(self):
+        """Скидає завантажені шрифти (наприклад, після заміни файлів)"""
+        with self._lock:
+            self._fonts.clear()
+            self._paths.clear()
+
+
+_registries: Dict[str, FontRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_font_registry(fonts_dir: str = "resources/assets/fonts") -> FontRegistry:
+    """Повертає спільний реєстр шрифтів для каталогу"""
+    key = os.path.abspath(fonts_dir)
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = FontRegistry(fonts_dir)
+            _registries[key] = registry
+        return registry
@@ -0,0 +1,83 @@
+import hashlib
+import json
+import os
+import threading
+from dataclasses import asdict
+from typing import Dict, Optional
+
+from core.models.card import Card
+from infrastructure.storage.file_hash import file_hasher
+
+
+class RenderCache:
+    """Постійний кеш рендерів: пропускає картки, вхідні дані яких не змінилися"""
+
+    def __init__(self, manifest_path: str = "export/.render_cache.json"):
+        self.manifest_path = manifest_path
+        self._entries: Dict[str, str] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """Завантажує маніфест з диска"""
+        if not os.path.exists(self.manifest_path):
+            return
+
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f).get("entries", {})
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Пошкоджений кеш рендерів, його буде перебудовано: {e}")
+            self._entries = {}
+
+    def card_key(self, card: Card, renderer_fingerprint: str, language: str = "") -> str:
+        """Обчислює ключ рендеру картки з її полів, ілюстрації та відбитка рендерера"""
+        fields = asdict(card)
+        image_path = fields.pop("image_path")
+        payload = {
+            "card": fields,
+            "image": file_hasher.digest(image_path) if image_path else None,
+            "renderer": renderer_fingerprint,
+            "language": language,
+        }
+        data = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        return hashlib.sha256(data).hexdigest()
+
+    def is_fresh(self, output_path: str, key: str) -> bool:
+        """Перевіряє, чи файл рендеру існує та відповідає ключу"""
+        with self._lock:
+            cached = self._entries.get(os.path.abspath(output_path))
+        return cached == key and os.path.exists(output_path)
+
+    def update(self, output_path: str, key: str):
+        """Запам'ятовує ключ для щойно збереженого рендеру"""
+        with self._lock:
+            self._entries[os.path.abspath(output_path)] = key
+            self._dirty = True
+
+    def invalidate(self, output_path: Optional[str] = None):
+        """Скидає запис для файлу або весь кеш"""
+        with self._lock:
+            if output_path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(output_path), None)
+            self._dirty = True
+
+    def save(self):
+        """Атомарно записує маніфест на диск"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"entries": dict(self._entries)}
+            self._dirty = False
+
+        directory = os.path.dirname(self.manifest_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)
@@ -0,0 +1,126 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from PIL import ImageColor, ImageFont
+
+Color = Tuple[int, int, int, int]
+FontLoader = Callable[[str, int, bool], ImageFont.ImageFont]
+
+
+@dataclass(frozen=True)
+class PlanItem:
+    name: str
+    kind: str
+    x: int
+    y: int
+    width: Optional[int]
+    height: Optional[int]
+    z: int
+    text: str = ""
+    font: Optional[ImageFont.ImageFont] = None
+    font_size: int = 0
+    font_family: str = ""
+    font_bold: bool = False
+    min_font_size: Optional[int] = None
+    color: Color = (255, 255, 255, 255)
+    opacity: float = 1.0
+
+    @property
+    def box(self) -> Tuple[int, int, Optional[int], Optional[int]]:
+        return self.x, self.y, self.width, self.height
+
+
+@dataclass(frozen=True)
+class RenderPlan:
+    width: int
+    height: int
+    dpi: int
+    background: Color
+    items: Tuple[PlanItem, ...]
+    scale: float = 1.0
+
+    def item(self, name: str) -> Optional[PlanItem]:
+        """Повертає елемент плану за назвою"""
+        for item in self.items:
+            if item.name == name:
+                return item
+        return None
+
+
+def parse_color(value: Any, default: Color = (255, 255, 255, 255)) -> Color:
+    """Перетворює колір шаблону (#RRGGBB, назва, список) у RGBA-кортеж"""
+    if value is None:
+        return default
+
+    if isinstance(value, (list, tuple)):
+        rgba = tuple(int(c) for c in value)
+    else:
+        try:
+            rgba = ImageColor.getrgb(str(value))
+        except ValueError:
+            return default
+
+    if len(rgba) == 3:
+        rgba = rgba + (255,)
+    return rgba
+
+
+def compile_template(template: Dict[str, Any], font_loader: FontLoader, scale: float = 1.0) -> RenderPlan:
+    """Компілює JSON-шаблон у незмінний план рендерингу, відсортований за z.
+
+    Усі координати, розміри та кеглі множаться на scale, тож рендер одразу
+    виконується у цільовій роздільності без подальшого передискретизування.
+    """
+    meta = template.get("meta", {})
+    items = []
+
+    def scaled(value: Any) -> int:
+        return max(1, int(round(float(value) * scale)))
+
+    for order, (name, data) in enumerate(template.get("items", {}).items()):
+        kind = data.get("type", "text")
+        pos = data.get("pos", {})
+        size = data.get("size", {})
+
+        width = size.get("w", data.get("text_width"))
+        height = size.get("h", data.get("text_height"))
+
+        font_spec = data.get("font", {})
+        font = None
+        font_size = scaled(font_spec.get("size", 20)) if kind == "text" else 0
+        font_family = font_spec.get("family", "")
+        font_bold = bool(font_spec.get("bold", False))
+        min_font_size = font_spec.get("min_size")
+        if kind == "text":
+            font = font_loader(font_family, font_size, font_bold)
+
+        item = PlanItem(
+            name=name,
+            kind=kind,
+            x=int(round(float(pos.get("x", 0)) * scale)),
+            y=int(round(float(pos.get("y", 0)) * scale)),
+            width=scaled(width) if width is not None else None,
+            height=scaled(height) if height is not None else None,
+            z=int(data.get("z", 0)),
+            text=str(data.get("text", "")),
+            font=font,
+            font_size=font_size,
+            font_family=font_family,
+            font_bold=font_bold,
+            min_font_size=scaled(min_font_size) if min_font_size is not None else None,
+            color=parse_color(data.get("color")),
+            opacity=float(data.get("opacity", 1.0)),
+        )
+        items.append((item.z, order, item))
+
+    # Стабільне сортування: елементи з однаковим z зберігають порядок шаблону
+    items.sort(key=lambda entry: (entry[0], entry[1]))
+
+    return RenderPlan(
+        width=scaled(meta.get("width", 744)),
+        height=scaled(meta.get("height", 1038)),
+        dpi=int(round(float(meta.get("dpi", 300)) * scale)),
+        background=parse_color(meta.get("background"), (0, 0, 0, 0)),
+        items=tuple(entry[2] for entry in items),
+        scale=scale,
+    )
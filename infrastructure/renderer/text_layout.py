@@ -0,0 +1,189 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from PIL import ImageFont
+
+FontLoader = Callable[[str, int, bool], ImageFont.ImageFont]
+FontKey = Tuple[str, int, bool]
+LayoutKey = Tuple[str, int, bool, str, int, Optional[int], int]
+
+ELLIPSIS = "…"
+
+
+@dataclass(frozen=True)
+class TextLayout:
+    lines: Tuple[str, ...]
+    font: ImageFont.ImageFont
+    font_size: int
+    line_height: int
+
+    @property
+    def height(self) -> int:
+        return self.line_height * len(self.lines)
+
+
+class TextLayoutEngine:
+    """Перенесення та автоматичне зменшення тексту під розмір блоку з кешуванням вимірювань"""
+
+    def __init__(self, font_loader: FontLoader, max_layouts: int = 4096, max_measurements: int = 65536):
+        self.font_loader = font_loader
+        self.max_layouts = max_layouts
+        self.max_measurements = max_measurements
+
+        self._layouts: "OrderedDict[LayoutKey, TextLayout]" = OrderedDict()
+        self._widths: Dict[Tuple[FontKey, str], float] = {}
+        self._lock = threading.Lock()
+
+        # Лічильники для діагностики
+        self.hits = 0
+        self.misses = 0
+
+    def layout(
+        self,
+        text: str,
+        family: str,
+        size: int,
+        bold: bool,
+        width: int,
+        height: Optional[int] = None,
+        min_size: Optional[int] = None,
+    ) -> TextLayout:
+        """Розбиває текст на рядки шириною не більше width.
+
+        Якщо задано height, розмір шрифту зменшується до min_size, доки текст не вміститься;
+        зайві рядки на мінімальному розмірі обрізаються з трикрапкою.
+        """
+        min_size = min(size, min_size or max(8, int(size * 0.6)))
+        key = (family, size, bold, text, width, height, min_size)
+
+        with self._lock:
+            layout = self._layouts.get(key)
+            if layout is not None:
+                self._layouts.move_to_end(key)
+                self.hits += 1
+                return layout
+            self.misses += 1
+
+        layout = self._fit(text, family, size, bold, width, height, min_size)
+
+        with self._lock:
+            self._layouts[key] = layout
+            if len(self._layouts) > self.max_layouts:
+                self._layouts.popitem(last=False)
+
+        return layout
+
+    def stats(self) -> Dict[str, int]:
+        """Повертає статистику кешу розкладок"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "layouts": len(self._layouts),
+                "measurements": len(self._widths),
+            }
+
+    def _fit(
+        self, text: str, family: str, size: int, bold: bool, width: int, height: Optional[int], min_size: int
+    ) -> TextLayout:
+        """Підбирає найбільший розмір шрифту, за якого текст вміщується у блок"""
+        current = size
+        while True:
+            font_key = (family, current, bold)
+            font = self.font_loader(family, current, bold)
+            lines = self._wrap(text, font_key, font, width)
+            line_height = self._line_height(font, current)
+
+            if height is None or line_height * len(lines) <= height:
+                return TextLayout(tuple(lines), font, current, line_height)
+
+            if current <= min_size:
+                max_lines = max(1, height // line_height)
+                lines = self._truncate(lines, max_lines, font_key, font, width)
+                return TextLayout(tuple(lines), font, current, line_height)
+
+            current -= 1
+
+    def _wrap(self, text: str, font_key: FontKey, font: ImageFont.ImageFont, width: int) -> List[str]:
+        """Жадібно переносить слова, зберігаючи явні переноси рядків"""
+        lines: List[str] = []
+        space = self._measure(font_key, font, " ")
+
+        for paragraph in text.split("\n"):
+            words = paragraph.split()
+            if not words:
+                lines.append("")
+                continue
+
+            line = ""
+            line_width = 0.0
+            for word in words:
+                word_width = self._measure(font_key, font, word)
+
+                if word_width > width:
+                    # Задовге слово розбиваємо посимвольно
+                    if line:
+                        lines.append(line)
+                    pieces = self._split_word(word, font_key, font, width)
+                    lines.extend(pieces[:-1])
+                    line = pieces[-1]
+                    line_width = self._measure(font_key, font, line)
+                elif not line:
+                    line, line_width = word, word_width
+                elif line_width + space + word_width <= width:
+                    line = f"{line} {word}"
+                    line_width += space + word_width
+                else:
+                    lines.append(line)
+                    line, line_width = word, word_width
+
+            lines.append(line)
+
+        return lines
+
+    def _split_word(self, word: str, font_key: FontKey, font: ImageFont.ImageFont, width: int) -> List[str]:
+        """Розбиває слово на частини, що вміщуються у ширину"""
+        pieces = []
+        piece = ""
+        for char in word:
+            if piece and self._measure(font_key, font, piece + char) > width:
+                pieces.append(piece)
+                piece = char
+            else:
+                piece += char
+        pieces.append(piece)
+        return pieces
+
+    def _truncate(
+        self, lines: List[str], max_lines: int, font_key: FontKey, font: ImageFont.ImageFont, width: int
+    ) -> List[str]:
+        """Обрізає текст до max_lines рядків, додаючи трикрапку"""
+        if len(lines) <= max_lines:
+            return lines
+
+        kept = lines[:max_lines]
+        last = kept[-1]
+        while last and self._measure(font_key, font, last + ELLIPSIS) > width:
+            last = last[:-1]
+        kept[-1] = last.rstrip() + ELLIPSIS
+        return kept
+
+    def _measure(self, font_key: FontKey, font: ImageFont.ImageFont, text: str) -> float:
+        """Повертає ширину тексту, кешуючи результат для пари (шрифт, текст)"""
+        key = (font_key, text)
+        width = self._widths.get(key)
+        if width is None:
+            width = font.getlength(text)
+            if len(self._widths) >= self.max_measurements:
+                self._widths.clear()
+            self._widths[key] = width
+        return width
+
+    def _line_height(self, font: ImageFont.ImageFont, size: int) -> int:
+        """Повертає висоту рядка для шрифту"""
+        if hasattr(font, "getmetrics"):
+            ascent, descent = font.getmetrics()
+            return ascent + descent
+        return int(size * 1.2)
@@ -0,0 +1,40 @@
+import hashlib
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+
+class FileHasher:
+    """Обчислює SHA-256 вмісту файлів, запам'ятовуючи результат за (шлях, mtime, розмір)"""
+
+    def __init__(self, chunk_size: int = 1024 * 1024):
+        self.chunk_size = chunk_size
+        self._digests: Dict[str, Tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+
+    def digest(self, path: str) -> Optional[str]:
+        """Повертає hex-дайджест вмісту файлу або None, якщо файлу немає"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        path = os.path.abspath(path)
+        with self._lock:
+            cached = self._digests.get(path)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(self.chunk_size), b""):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+
+        with self._lock:
+            self._digests[path] = (stat.st_mtime_ns, stat.st_size, digest)
+        return digest
+
+
+# Глобальний екземпляр для спільного використання
+file_hasher = FileHasher()
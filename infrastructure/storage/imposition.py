@@ -0,0 +1,132 @@
+from dataclasses import dataclass
+from typing import List, Tuple
+
+# Відступ міток різу від зони виліту та їхня максимальна довжина, мм
+CROP_MARK_OFFSET = 1.0
+CROP_MARK_LENGTH = 5.0
+# Смуга біля краю паперу, яку більшість принтерів не друкує, мм
+UNPRINTABLE_EDGE = 3.0
+
+
+@dataclass(frozen=True)
+class Slot:
+    """Місце картки на аркуші; координати в мм від верхнього лівого кута"""
+    x: float  # Лінія різу (trim box)
+    y: float
+    width: float
+    height: float
+    bleed: float = 0.0
+
+    @property
+    def image_box(self) -> Tuple[float, float, float, float]:
+        """Область зображення разом з вилітом: (x, y, ширина, висота)"""
+        return (
+            self.x - self.bleed,
+            self.y - self.bleed,
+            self.width + 2 * self.bleed,
+            self.height + 2 * self.bleed,
+        )
+
+
+Line = Tuple[float, float, float, float]
+
+
+@dataclass(frozen=True)
+class SheetLayout:
+    """Попередньо обчислена розкладка аркуша: місця лицьових сторін, дзеркальні місця зворотів та мітки різу"""
+    page_width: float
+    page_height: float
+    columns: int
+    rows: int
+    front_slots: Tuple[Slot, ...]
+    back_slots: Tuple[Slot, ...]
+    crop_marks: Tuple[Line, ...]
+
+    @property
+    def cards_per_page(self) -> int:
+        return len(self.front_slots)
+
+
+def compute_layout(
+    page_width: float,
+    page_height: float,
+    card_width: float,
+    card_height: float,
+    margin: float = 10,
+    gutter: float = 0,
+    bleed: float = 0,
+    crop_marks: bool = False,
+    duplex: str = "long",
+) -> SheetLayout:
+    """Обчислює сітку карток на аркуші.
+
+    Сітка центрується у межах полів; кожна картка займає card + 2 * bleed, між
+    сусідніми картками додається gutter. Звороти дзеркаляться відносно довгого
+    (duplex="long") або короткого (duplex="short") краю, щоб після двостороннього
+    друку зворот опинився точно під своєю лицьовою стороною.
+    """
+    cell_width = card_width + 2 * bleed
+    cell_height = card_height + 2 * bleed
+
+    columns = int((page_width - 2 * margin + gutter) // (cell_width + gutter))
+    rows = int((page_height - 2 * margin + gutter) // (cell_height + gutter))
+    if columns < 1 or rows < 1:
+        raise ValueError("Картка не вміщується на аркуші з такими полями")
+
+    block_width = columns * cell_width + (columns - 1) * gutter
+    block_height = rows * cell_height + (rows - 1) * gutter
+    left = (page_width - block_width) / 2
+    top = (page_height - block_height) / 2
+
+    front_slots: List[Slot] = []
+    back_slots: List[Slot] = []
+    for row in range(rows):
+        for col in range(columns):
+            x = left + col * (cell_width + gutter) + bleed
+            y = top + row * (cell_height + gutter) + bleed
+            front_slots.append(Slot(x, y, card_width, card_height, bleed))
+
+            if duplex == "short":
+                back_slots.append(Slot(x, page_height - y - card_height, card_width, card_height, bleed))
+            else:
+                back_slots.append(Slot(page_width - x - card_width, y, card_width, card_height, bleed))
+
+    marks: Tuple[Line, ...] = ()
+    if crop_marks:
+        marks = _crop_marks(front_slots, left, top, block_width, block_height)
+
+    return SheetLayout(
+        page_width=page_width,
+        page_height=page_height,
+        columns=columns,
+        rows=rows,
+        front_slots=tuple(front_slots),
+        back_slots=tuple(back_slots),
+        crop_marks=marks,
+    )
+
+
+def _crop_marks(slots: List[Slot], left: float, top: float, block_width: float, block_height: float) -> Tuple[Line, ...]:
+    """Мітки різу по зовнішньому краю сітки, щоб вони не перекривали сусідні картки"""
+    right = left + block_width
+    bottom = top + block_height
+    # Мітки не заходять на край паперу, недоступний для друку
+    length = min(
+        CROP_MARK_LENGTH,
+        left - CROP_MARK_OFFSET - UNPRINTABLE_EDGE,
+        top - CROP_MARK_OFFSET - UNPRINTABLE_EDGE,
+    )
+    if length <= 0:
+        return ()
+
+    cuts_x = sorted({round(v, 3) for s in slots for v in (s.x, s.x + s.width)})
+    cuts_y = sorted({round(v, 3) for s in slots for v in (s.y, s.y + s.height)})
+
+    lines: List[Line] = []
+    for x in cuts_x:
+        lines.append((x, top - CROP_MARK_OFFSET - length, x, top - CROP_MARK_OFFSET))
+        lines.append((x, bottom + CROP_MARK_OFFSET, x, bottom + CROP_MARK_OFFSET + length))
+    for y in cuts_y:
+        lines.append((left - CROP_MARK_OFFSET - length, y, left - CROP_MARK_OFFSET, y))
+        lines.append((right + CROP_MARK_OFFSET, y, right + CROP_MARK_OFFSET + length, y))
+    return tuple(lines)
@@ -1,109 +1,315 @@
-
+import multiprocessing
 import os
-from typing import List
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import chain, islice, repeat
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
 from PIL import Image
-from fpdf import FPDF
+from infrastructure.storage.imposition import SheetLayout, Slot, compute_layout
+from infrastructure.storage.pdf_image import PDFImage, encode_image, image_key, target_pixels
+from infrastructure.storage.pdf_manifest import PDFManifest
+from infrastructure.storage.pdf_stream_writer import StreamingPDFWriter
+
+ImageSource = Union[str, Image.Image]
+# Картка для інкрементного експорту: (хеш вмісту картки, функція, що рендерить її зображення)
+KeyedSource = Tuple[str, Callable[[], ImageSource]]
+# Менше зображень кодується в поточному процесі, якщо пул ще не запущено:
+# запуск процесів (spawn на Windows) коштує більше, ніж саме кодування
+PARALLEL_MIN_IMAGES = 16
+# Зображення в черзі кодування: (ключ, Future або готовий результат, вихідне зображення)
+PendingImage = Tuple[Optional[str], Union[Future, PDFImage, None], ImageSource]
 
 class PDFExporter:
-    def __init__(self):
+    def __init__(
+        self,
+        dpi: Optional[int] = None,
+        image_format: str = "flate",
+        jpeg_quality: int = 90,
+        compress_level: int = 6,
+        workers: Optional[int] = None,
+        bleed: float = 0,
+        gutter: float = 0,
+        crop_marks: bool = False,
+        duplex: str = "long",
+    ):
         self.page_width = 210  # A4 width in mm
         self.page_height = 297  # A4 height in mm
         self.margin = 10  # Margin in mm
         self.card_width = 70  # Card width in mm
         self.card_height = 100  # Card height in mm
 
-    def export_images(self, image_paths: List[str], output_path: str) -> str:
-        """Експортує список зображень у PDF"""
-        pdf = FPDF()
-        pdf.add_page()
+        # Параметри спуску смуг
+        self.bleed = bleed  # Виліт навколо картки, мм; зображення мають його містити
+        self.gutter = gutter  # Проміжок між картками, мм
+        self.crop_marks = crop_marks
+        self.duplex = duplex  # Край перевертання аркуша: "long" або "short"
 
-        # Розрахунок кількості карток на сторінці
-        cards_per_row = int((self.page_width - 2 * self.margin) / self.card_width)
-        cards_per_col = int((self.page_height - 2 * self.margin) / self.card_height)
-        cards_per_page = cards_per_row * cards_per_col
+        # Параметри вбудовування зображень
+        self.dpi = dpi  # None - вбудовувати у вихідній роздільності
+        self.image_format = image_format  # "flate" (без втрат) або "jpeg"
+        self.jpeg_quality = jpeg_quality
+        self.compress_level = compress_level
+        self.workers = workers or os.cpu_count() or 1
+        self._executor: Optional[ProcessPoolExecutor] = None
 
-        for i, image_path in enumerate(image_paths):
-            # Визначення позиції картки на сторінці
-            page_num = i // cards_per_page
-            card_num_on_page = i % cards_per_page
+    def layout(self) -> SheetLayout:
+        """Обчислює розкладку аркуша для поточних параметрів"""
+        return compute_layout(
+            self.page_width, self.page_height, self.card_width, self.card_height,
+            margin=self.margin, gutter=self.gutter, bleed=self.bleed,
+            crop_marks=self.crop_marks, duplex=self.duplex,
+        )
 
-            row = card_num_on_page // cards_per_row
-            col = card_num_on_page % cards_per_row
+    def _settings(self) -> Dict[str, Any]:
+        """Параметри, від яких залежить вміст сторінок; їхня зміна вимагає повної перебудови"""
+        return {
+            "page": [self.page_width, self.page_height, self.margin],
+            "card": [self.card_width, self.card_height],
+            "imposition": [self.bleed, self.gutter, self.crop_marks, self.duplex],
+            "encoding": [self.dpi, self.image_format, self.jpeg_quality, self.compress_level],
+        }
 
-            x = self.margin + col * self.card_width
-            y = self.margin + row * self.card_height
+    def _target_size(self) -> Optional[Tuple[int, int]]:
+        """Розмір картки разом з вилітом у пікселях при заданій роздільності друку"""
+        if not self.dpi:
+            return None
+        return target_pixels(self.card_width + 2 * self.bleed, self.card_height + 2 * self.bleed, self.dpi)
 
-            # Додавання нової сторінки, якщо потрібно
-            if page_num > 0 and card_num_on_page == 0:
-                pdf.add_page()
+    def _encode(self, image: ImageSource) -> PDFImage:
+        """Зменшує зображення до роздільності друку та кодує його для PDF"""
+        return encode_image(image, self._target_size(), self.image_format, self.jpeg_quality, self.compress_level)
 
-            # Додавання зображення
-            pdf.image(image_path, x, y, self.card_width, self.card_height)
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Пул живе між експортами, щоб не запускати процеси та не імпортувати PIL щоразу.
+        # spawn: fork з GUI-процесу (Qt, потоки) копіює чужі блокування та стан
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
 
-        # Збереження PDF
-        pdf.output(output_path)
-        return output_path
+    def _submit(self, image: ImageSource) -> Union[Future, PDFImage]:
+        """Передає зображення у пул; якщо пул зламаний, кодує його в поточному процесі"""
+        try:
+            # encode_image - функція модуля, тож її можна передати у робочий процес
+            return self._get_executor().submit(
+                encode_image, image, self._target_size(), self.image_format, self.jpeg_quality, self.compress_level
+            )
+        except BrokenProcessPool:
+            self.close()
+            return self._encode(image)
 
-    def export_deck_to_pdf(self, card_paths: List[str], output_path: str) -> str:
-        """Експортує колоду карток у PDF"""
-        pdf = FPDF()
-        pdf.add_page()
+    def _collect(self, pending: PendingImage) -> Tuple[Optional[str], Optional[PDFImage]]:
+        """Чекає результат кодування; при падінні пулу кодує зображення в поточному процесі"""
+        key, result, image = pending
+        if isinstance(result, Future):
+            try:
+                result = result.result()
+            except BrokenProcessPool:
+                # Робочий процес упав: наступне зображення піде у новий пул, це - кодується тут
+                self.close()
+                result = self._encode(image)
+        return key, result
+
+    def _encode_ahead(
+        self, images: Iterable[ImageSource], known: Iterable[str] = ()
+    ) -> Iterator[Tuple[Optional[str], Optional[PDFImage]]]:
+        """Кодує зображення у пулі процесів, повертаючи (ключ, PDFImage) у вихідному порядку.
+
+        Декодування, перетворення кольору та стиснення виконуються паралельно, а писач
+        отримує вже стиснені потоки. Для повторного вмісту повертається (ключ, None) -
+        його XObject уже записано. Наперед кодується не більше 2 * workers зображень,
+        тож пам'ять залишається обмеженою. known - ключі зображень, уже записаних у файл.
+        Невеликі експорти до першого запуску пулу кодуються в поточному процесі.
+        """
+        seen: Set[str] = set(known)
+        images = iter(images)
+        head = list(islice(images, PARALLEL_MIN_IMAGES))
+
+        if self.workers <= 1 or (self._executor is None and len(head) < PARALLEL_MIN_IMAGES):
+            # Без пулу: немає сенсу платити за запуск процесів та передачу пікселів
+            for image in chain(head, images):
+                key = image_key(image)
+                if key is not None and key in seen:
+                    yield key, None
+                    continue
+                if key is not None:
+                    seen.add(key)
+                yield key, self._encode(image)
+            return
+
+        window = self.workers * 2
+        # Вихідне зображення тримається до отримання результату на випадок падіння пулу
+        pending: Deque[PendingImage] = deque()
+
+        for image in chain(head, images):
+            key = image_key(image)
+            if key is not None and key in seen:
+                pending.append((key, None, image))
+            else:
+                if key is not None:
+                    seen.add(key)
+                pending.append((key, self._submit(image), image))
+
+            while len(pending) > window:
+                yield self._collect(pending.popleft())
+
+        while pending:
+            yield self._collect(pending.popleft())
+
+    def close(self):
+        """Зупиняє пул процесів кодування"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _embed(self, writer: StreamingPDFWriter, key: Optional[str], encoded: Optional[PDFImage]) -> str:
+        """Вбудовує зображення один раз: однаковий вміст посилається на той самий XObject"""
+        if encoded is None:
+            return writer.find_image(key)
+        return writer.add_image(encoded, key)
 
-        # Розрахунок кількості карток на сторінці
-        cards_per_row = int((self.page_width - 2 * self.margin) / self.card_width)
-        cards_per_col = int((self.page_height - 2 * self.margin) / self.card_height)
-        cards_per_page = cards_per_row * cards_per_col
+    def _begin_sheet(self, writer: StreamingPDFWriter, layout: SheetLayout):
+        writer.begin_page()
+        # Мітки малюються першими і лежать поза сіткою, тож зображення їх не перекривають
+        for line in layout.crop_marks:
+            writer.draw_line(*line)
 
-        for i, card_path in enumerate(card_paths):
-            # Визначення позиції картки на сторінці
-            page_num = i // cards_per_page
-            card_num_on_page = i % cards_per_page
+    def _place(self, writer: StreamingPDFWriter, name: str, slot: Slot):
+        writer.place_image(name, *slot.image_box)
 
-            row = card_num_on_page // cards_per_row
-            col = card_num_on_page % cards_per_row
+    def _impose(
+        self,
+        writer: StreamingPDFWriter,
+        layout: SheetLayout,
+        encoded: Iterator[Tuple[Optional[str], Optional[PDFImage]]],
+        with_backs: bool = False,
+        backs_only: bool = False,
+    ):
+        """Розкладає закодовані зображення по місцях аркушів за один прохід.
 
-            x = self.margin + col * self.card_width
-            y = self.margin + row * self.card_height
+        with_backs: потік містить пари (лицьова, зворот); після кожного аркуша лицьових
+        сторін записується аркуш зворотів у дзеркальних місцях.
+        backs_only: усі зображення розміщуються в місцях зворотів.
+        """
+        slots = layout.back_slots if backs_only else layout.front_slots
+        per_page = layout.cards_per_page
+        backs: List[str] = []
 
-            # Додавання нової сторінки, якщо потрібно
-            if page_num > 0 and card_num_on_page == 0:
-                pdf.add_page()
+        def flush_backs():
+            if not backs:
+                return
+            self._begin_sheet(writer, layout)
+            for slot, back in zip(layout.back_slots, backs):
+                self._place(writer, back, slot)
+            backs.clear()
 
-            # Додавання зображення
-            pdf.image(card_path, x, y, self.card_width, self.card_height)
+        index = 0
+        for key, image in encoded:
+            slot_index = index % per_page
+            if slot_index == 0:
+                flush_backs()
+                self._begin_sheet(writer, layout)
 
-        # Збереження PDF
-        pdf.output(output_path)
+            # Закодоване зображення записується одразу, після чого звільняється
+            self._place(writer, self._embed(writer, key, image), slots[slot_index])
+
+            if with_backs:
+                backs.append(self._embed(writer, *next(encoded)))
+            index += 1
+
+        flush_backs()
+
+    def _export(self, images: Iterable[ImageSource], output_path: str, with_backs: bool = False, backs_only: bool = False) -> str:
+        layout = self.layout()
+        with StreamingPDFWriter(output_path, self.page_width, self.page_height) as writer:
+            self._impose(writer, layout, self._encode_ahead(images), with_backs, backs_only)
         return output_path
 
+    def export_images(self, image_paths: Iterable[ImageSource], output_path: str) -> str:
+        """Експортує зображення (шляхи до файлів або PIL.Image) у PDF"""
+        return self.export_images_streaming(image_paths, output_path)
+
+    def export_images_streaming(self, images: Iterable[ImageSource], output_path: str) -> str:
+        """Експортує зображення у PDF потоково: кожна сторінка записується на диск одразу.
+
+        Приймає генератор шляхів або PIL.Image; у пам'яті одночасно перебуває лише вікно
+        зображень, що кодуються паралельно.
+        """
+        return self._export(images, output_path)
+
+    def export_deck_to_pdf(self, card_paths: List[str], output_path: str) -> str:
+        """Експортує колоду карток у PDF"""
+        return self._export(card_paths, output_path)
+
     def export_card_backs(self, count: int, back_image_path: str, output_path: str) -> str:
-        """Експортує зворотні сторони карток у PDF"""
-        pdf = FPDF()
-        pdf.add_page()
+        """Експортує зворотні сторони карток у PDF (зворот вбудовується один раз)"""
+        return self._export(repeat(back_image_path, count), output_path, backs_only=True)
+
+    def export_duplex(self, cards: Iterable[Tuple[ImageSource, ImageSource]], output_path: str) -> str:
+        """Експортує лицьові сторони та звороти для двостороннього друку за один прохід колодою.
+
+        cards - пари (лицьова сторона, зворот); аркуші лицьових сторін чергуються з
+        аркушами зворотів, розкладених дзеркально відносно краю перевертання.
+        """
+        return self._export(chain.from_iterable(cards), output_path, with_backs=True)
+
+    def export_incremental(self, cards: Sequence[KeyedSource], output_path: str) -> str:
+        """Експортує картки у PDF, перерендерюючи лише сторінки зі зміненими картками.
+
+        Поруч з PDF зберігається маніфест з хешами карток кожної сторінки. Під час
+        повторного експорту незмінені сторінки (разом з їхніми потоками вмісту та
+        зображеннями) лишаються у файлі, а нові сторінки дописуються в кінець як
+        інкрементне оновлення PDF. Зміна параметрів експорту або стороннє редагування
+        файлу призводить до повної перебудови.
+        """
+        layout = self.layout()
+        per_page = layout.cards_per_page
+        pages = [list(cards[i:i + per_page]) for i in range(0, len(cards), per_page)]
+
+        settings = self._settings()
+        manifest = PDFManifest(output_path)
+        resume = manifest.resume_state(settings)
+        old_pages = manifest.pages if resume is not None else []
 
-        # Розрахунок кількості карток на сторінці
-        cards_per_row = int((self.page_width - 2 * self.margin) / self.card_width)
-        cards_per_col = int((self.page_height - 2 * self.margin) / self.card_height)
-        cards_per_page = cards_per_row * cards_per_col
+        # Для кожної сторінки - номер об'єкта, якщо її склад не змінився
+        reused: List[Optional[int]] = []
+        for index, page in enumerate(pages):
+            keys = [key for key, _ in page]
+            old = old_pages[index] if index < len(old_pages) else None
+            reused.append(old["id"] if old and old["cards"] == keys else None)
 
-        for i in range(count):
-            # Визначення позиції картки на сторінці
-            page_num = i // cards_per_page
-            card_num_on_page = i % cards_per_page
+        if resume is not None and len(pages) == len(old_pages) and all(page_id is not None for page_id in reused):
+            return output_path
 
-            row = card_num_on_page // cards_per_row
-            col = card_num_on_page % cards_per_row
+        changed = (
+            loader()
+            for page, page_id in zip(pages, reused) if page_id is None
+            for _, loader in page
+        )
+        known = resume.images.keys() if resume is not None else ()
+        encoded = self._encode_ahead(changed, known)
 
-            x = self.margin + col * self.card_width
-            y = self.margin + row * self.card_height
+        with StreamingPDFWriter(output_path, self.page_width, self.page_height, resume) as writer:
+            for page, page_id in zip(pages, reused):
+                if page_id is not None:
+                    writer.reuse_page(page_id)
+                    continue
 
-            # Додавання нової сторінки, якщо потрібно
-            if page_num > 0 and card_num_on_page == 0:
-                pdf.add_page()
+                self._begin_sheet(writer, layout)
+                for slot, _ in zip(layout.front_slots, page):
+                    self._place(writer, self._embed(writer, *next(encoded)), slot)
 
-            # Додавання зображення
-            pdf.image(back_image_path, x, y, self.card_width, self.card_height)
+        page_ids = writer.page_ids
+        manifest.update(
+            settings,
+            [{"id": page_id, "cards": [key for key, _ in page]} for page_id, page in zip(page_ids, pages)],
+            writer.state(),
+            rebuilt=resume is None,
+        )
+        manifest.save()
 
-        # Збереження PDF
-        pdf.output(output_path)
+        rebuilt = sum(1 for page_id in reused if page_id is None)
+        print(f"[INFO] Інкрементний експорт PDF: оновлено {rebuilt} з {len(pages)} сторінок")
         return output_path
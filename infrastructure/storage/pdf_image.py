@@ -0,0 +1,118 @@
+import hashlib
+import io
+import zlib
+from dataclasses import dataclass
+from typing import Optional, Tuple, Union
+
+from PIL import Image
+
+from infrastructure.storage.file_hash import file_hasher
+
+
+@dataclass
+class PDFImage:
+    width: int
+    height: int
+    color_space: str
+    filter: str
+    data: bytes
+    bits_per_component: int = 8
+    smask: Optional["PDFImage"] = None
+
+
+def _flate(image: Image.Image, color_space: str, compress_level: int = 6) -> PDFImage:
+    """Стискає сирі пікселі зображення алгоритмом Flate"""
+    return PDFImage(
+        width=image.width,
+        height=image.height,
+        color_space=color_space,
+        filter="FlateDecode",
+        data=zlib.compress(image.tobytes(), compress_level),
+    )
+
+
+def _jpeg(image: Image.Image, color_space: str, quality: int) -> PDFImage:
+    """Стискає зображення у JPEG (DCTDecode)"""
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return PDFImage(image.width, image.height, color_space, "DCTDecode", buffer.getvalue())
+
+
+def target_pixels(width_mm: float, height_mm: float, dpi: int) -> Tuple[int, int]:
+    """Кількість пікселів, потрібна для друку області заданого розміру з роздільністю dpi"""
+    return max(1, round(width_mm / 25.4 * dpi)), max(1, round(height_mm / 25.4 * dpi))
+
+
+def _needs_resample(size: Tuple[int, int], target_size: Optional[Tuple[int, int]]) -> bool:
+    # Зображення лише зменшуються: збільшення не додає деталей, але роздуває файл
+    return target_size is not None and (size[0] > target_size[0] or size[1] > target_size[1])
+
+
+def image_key(source: Union[str, Image.Image]) -> Optional[str]:
+    """Повертає хеш вмісту зображення для дедуплікації XObject у PDF"""
+    if isinstance(source, str):
+        digest = file_hasher.digest(source)
+        return f"file:{digest}" if digest else None
+
+    sha = hashlib.sha256(f"{source.mode}:{source.width}x{source.height}:".encode("ascii"))
+    sha.update(source.tobytes())
+    return f"pixels:{sha.hexdigest()}"
+
+
+def encode_image(
+    source: Union[str, Image.Image],
+    target_size: Optional[Tuple[int, int]] = None,
+    image_format: str = "flate",
+    quality: int = 90,
+    compress_level: int = 6,
+) -> PDFImage:
+    """Кодує зображення (шлях або PIL.Image) у потік XObject для PDF.
+
+    Якщо задано target_size, більші зображення зменшуються до нього перед кодуванням.
+    JPEG-файли, яким не потрібне зменшення, вбудовуються як є (DCTDecode) без декодування;
+    решта зображень стискається Flate або JPEG (image_format), а неповністю непрозорий
+    альфа-канал стає SMask.
+    """
+    if isinstance(source, str):
+        with Image.open(source) as image:
+            if image.format == "JPEG" and image.mode in ("RGB", "L") and not _needs_resample(image.size, target_size):
+                with open(source, 'rb') as f:
+                    data = f.read()
+                color_space = "DeviceRGB" if image.mode == "RGB" else "DeviceGray"
+                return PDFImage(image.width, image.height, color_space, "DCTDecode", data)
+
+            if target_size is not None and image.format == "JPEG":
+                # Декодування JPEG одразу у зменшеному масштабі
+                image.draft(image.mode, target_size)
+            image.load()
+            return encode_image(image, target_size, image_format, quality, compress_level)
+
+    image = source
+    smask = None
+
+    if _needs_resample(image.size, target_size):
+        if image.mode not in ("RGB", "RGBA", "L", "LA"):
+            image = image.convert("RGBA")
+        image = image.resize(target_size, Image.LANCZOS)
+
+    if image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info):
+        image = image.convert("RGBA")
+        alpha = image.getchannel("A")
+        if alpha.getextrema() != (255, 255):
+            smask = _flate(alpha, "DeviceGray", compress_level)
+        image = image.convert("RGB")
+
+    if image.mode == "L":
+        color_space = "DeviceGray"
+    else:
+        color_space = "DeviceRGB"
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+
+    if image_format == "jpeg":
+        encoded = _jpeg(image, color_space, quality)
+    else:
+        encoded = _flate(image, color_space, compress_level)
+
+    encoded.smask = smask
+    return encoded
@@ -0,0 +1,83 @@
+import json
+import os
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional
+
+from infrastructure.storage.pdf_stream_writer import WriterState
+
+MANIFEST_VERSION = 1
+# Якщо через оновлення файл виріс більш ніж у стільки разів, він перебудовується повністю,
+# щоб не накопичувати мертві об'єкти
+MAX_GROWTH = 2.0
+
+
+class PDFManifest:
+    """Супровідний маніфест PDF: які картки (за хешем вмісту) потрапили на які сторінки"""
+
+    def __init__(self, pdf_path: str):
+        self.pdf_path = pdf_path
+        self.manifest_path = f"{pdf_path}.manifest.json"
+        self.settings: Dict[str, Any] = {}
+        self.pages: List[Dict[str, Any]] = []  # {"id": номер об'єкта сторінки, "cards": [ключі карток]}
+        self.state: Optional[WriterState] = None
+        self.base_size = 0  # Розмір файлу після останньої повної перебудови
+        self._load()
+
+    def _load(self):
+        """Завантажує маніфест з диска"""
+        if not os.path.exists(self.manifest_path):
+            return
+
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") != MANIFEST_VERSION:
+                return
+            self.settings = data["settings"]
+            self.pages = data["pages"]
+            state = data["state"]
+            state["images"] = {key: tuple(value) for key, value in state["images"].items()}
+            self.state = WriterState(**state)
+            self.base_size = data["base_size"]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"[WARN] Пошкоджений маніфест PDF, файл буде перебудовано: {e}")
+            self.pages = []
+            self.state = None
+
+    def resume_state(self, settings: Dict[str, Any]) -> Optional[WriterState]:
+        """Повертає стан для дописування оновлення або None, якщо потрібна повна перебудова"""
+        if self.state is None or settings != self.settings:
+            return None
+
+        try:
+            file_size = os.path.getsize(self.pdf_path)
+        except OSError:
+            return None
+
+        # Файл змінено поза експортером або він надто розрісся від оновлень
+        if file_size != self.state.file_size or file_size > self.base_size * MAX_GROWTH:
+            return None
+        return self.state
+
+    def update(self, settings: Dict[str, Any], pages: List[Dict[str, Any]], state: WriterState, rebuilt: bool):
+        """Запам'ятовує розкладку та стан щойно записаного файлу"""
+        self.settings = settings
+        self.pages = pages
+        self.state = state
+        if rebuilt:
+            self.base_size = state.file_size
+
+    def save(self):
+        """Атомарно записує маніфест на диск"""
+        data = {
+            "version": MANIFEST_VERSION,
+            "settings": self.settings,
+            "pages": self.pages,
+            "state": asdict(self.state),
+            "base_size": self.base_size,
+        }
+
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)
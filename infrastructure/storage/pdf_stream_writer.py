@@ -0,0 +1,258 @@
+import os
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from infrastructure.storage.pdf_image import PDFImage
+
+PT_PER_MM = 72 / 25.4
+
+# Зарезервовані номери об'єктів: каталог та дерево сторінок записуються в кінці
+CATALOG_ID = 1
+PAGES_ID = 2
+
+
+@dataclass
+class WriterState:
+    """Стан завершеного документа, потрібний для дописування інкрементного оновлення"""
+    next_id: int
+    startxref: int
+    file_size: int
+    image_count: int = 0
+    images: Dict[str, Tuple[str, int]] = field(default_factory=dict)  # ключ вмісту -> (ім'я, номер об'єкта)
+
+
+class StreamingPDFWriter:
+    """Мінімальний PDF-писач, що записує об'єкти на диск одразу після створення.
+
+    У пам'яті тримаються лише зсуви об'єктів та номери сторінок, тому споживання
+    пам'яті не залежить від кількості та розміру вбудованих зображень.
+    """
+
+    def __init__(self, output_path: str, page_width: float, page_height: float, resume: Optional[WriterState] = None):
+        """resume - стан попереднього запису: нові об'єкти дописуються в кінець файлу
+        як інкрементне оновлення PDF, а незмінені сторінки та зображення лишаються на місці.
+        """
+        self.output_path = output_path
+        self.page_width = page_width * PT_PER_MM
+        self.page_height = page_height * PT_PER_MM
+        self._resume = resume
+
+        self._offsets: Dict[int, int] = {}
+        self._next_id = PAGES_ID + 1
+        self._page_ids: List[int] = []
+        self._image_ids: Dict[str, int] = {}
+        self._image_keys: Dict[str, str] = {}
+        self._image_count = 0
+        self._startxref: Optional[int] = None
+        self._file_size = 0
+
+        # Стан поточної сторінки
+        self._content: Optional[List[str]] = None
+        self._page_images: Dict[str, int] = {}
+
+        if resume is None:
+            # Новий документ пишеться у тимчасовий файл і замінює попередній лише після
+            # успішного завершення, тож помилка під час експорту не знищує старий PDF
+            self._path = f"{output_path}.tmp"
+            self._file = open(self._path, 'wb')
+            self._file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        else:
+            self._path = output_path
+            self._file = open(output_path, 'r+b')
+            self._file.seek(resume.file_size)
+            self._file.truncate()
+            self._next_id = resume.next_id
+            self._image_count = resume.image_count
+            for key, (name, obj_id) in resume.images.items():
+                self._image_ids[name] = obj_id
+                self._image_keys[key] = name
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def abort(self):
+        """Скасовує запис: попередній вміст файлу лишається незмінним"""
+        if self._file.closed:
+            return
+
+        if self._resume is None:
+            self._file.close()
+            os.remove(self._path)
+        else:
+            # Відкидаємо недописане оновлення, повертаючи файл до попереднього стану
+            self._file.truncate(self._resume.file_size)
+            self._file.close()
+
+    @property
+    def page_count(self) -> int:
+        return len(self._page_ids)
+
+    @property
+    def page_ids(self) -> List[int]:
+        return list(self._page_ids)
+
+    def state(self) -> WriterState:
+        """Повертає стан закритого документа для наступного інкрементного оновлення"""
+        images = {key: (name, self._image_ids[name]) for key, name in self._image_keys.items()}
+        return WriterState(self._next_id, self._startxref, self._file_size, self._image_count, images)
+
+    def _new_id(self) -> int:
+        obj_id = self._next_id
+        self._next_id += 1
+        return obj_id
+
+    def _write_object(self, obj_id: int, body: bytes):
+        self._offsets[obj_id] = self._file.tell()
+        self._file.write(f"{obj_id} 0 obj\n".encode("ascii"))
+        self._file.write(body)
+        self._file.write(b"\nendobj\n")
+
+    def _write_stream(self, obj_id: int, entries: str, data: bytes):
+        header = f"<< {entries} /Length {len(data)} >>\nstream\n".encode("ascii")
+        self._write_object(obj_id, header + data + b"\nendstream")
+
+    def find_image(self, key: Optional[str]) -> Optional[str]:
+        """Повертає ім'я вже вбудованого зображення з таким ключем вмісту"""
+        if key is None:
+            return None
+        return self._image_keys.get(key)
+
+    def add_image(self, image: PDFImage, key: Optional[str] = None) -> str:
+        """Записує зображення як XObject і повертає його ім'я для place_image.
+
+        Якщо задано key (хеш вмісту), повторні зображення з тим самим ключем не записуються.
+        """
+        existing = self.find_image(key)
+        if existing is not None:
+            return existing
+
+        smask_id = None
+        if image.smask is not None:
+            smask_id = self._new_id()
+            self._write_image(smask_id, image.smask, None)
+
+        obj_id = self._new_id()
+        self._write_image(obj_id, image, smask_id)
+
+        self._image_count += 1
+        name = f"Im{self._image_count}"
+        self._image_ids[name] = obj_id
+        if key is not None:
+            self._image_keys[key] = name
+        return name
+
+    def _write_image(self, obj_id: int, image: PDFImage, smask_id: Optional[int]):
+        entries = (
+            f"/Type /XObject /Subtype /Image /Width {image.width} /Height {image.height} "
+            f"/ColorSpace /{image.color_space} /BitsPerComponent {image.bits_per_component} "
+            f"/Filter /{image.filter}"
+        )
+        if smask_id is not None:
+            entries += f" /SMask {smask_id} 0 R"
+        self._write_stream(obj_id, entries, image.data)
+
+    def reuse_page(self, page_id: int):
+        """Додає до документа сторінку, записану попереднім оновленням, без змін"""
+        self.end_page()
+        self._page_ids.append(page_id)
+
+    def begin_page(self):
+        """Починає нову сторінку"""
+        if self._content is not None:
+            self.end_page()
+        self._content = []
+        self._page_images = {}
+
+    def place_image(self, name: str, x: float, y: float, width: float, height: float):
+        """Розміщує зображення на сторінці; координати в мм від верхнього лівого кута"""
+        w = width * PT_PER_MM
+        h = height * PT_PER_MM
+        left = x * PT_PER_MM
+        bottom = self.page_height - (y + height) * PT_PER_MM
+
+        self._content.append(f"q {w:.3f} 0 0 {h:.3f} {left:.3f} {bottom:.3f} cm /{name} Do Q")
+        self._page_images[name] = self._image_ids[name]
+
+    def draw_line(self, x1: float, y1: float, x2: float, y2: float, line_width: float = 0.25):
+        """Малює лінію (наприклад, мітку різу); координати в мм від верхнього лівого кута, товщина в pt"""
+        self._content.append(
+            f"q {line_width:.3f} w "
+            f"{x1 * PT_PER_MM:.3f} {self.page_height - y1 * PT_PER_MM:.3f} m "
+            f"{x2 * PT_PER_MM:.3f} {self.page_height - y2 * PT_PER_MM:.3f} l S Q"
+        )
+
+    def end_page(self):
+        """Записує вміст та об'єкт поточної сторінки"""
+        if self._content is None:
+            return
+
+        content_id = self._new_id()
+        content = zlib.compress("\n".join(self._content).encode("ascii"))
+        self._write_stream(content_id, "/Filter /FlateDecode", content)
+
+        xobjects = " ".join(f"/{name} {obj_id} 0 R" for name, obj_id in self._page_images.items())
+        page_id = self._new_id()
+        body = (
+            f"<< /Type /Page /Parent {PAGES_ID} 0 R "
+            f"/MediaBox [0 0 {self.page_width:.3f} {self.page_height:.3f}] "
+            f"/Resources << /XObject << {xobjects} >> >> /Contents {content_id} 0 R >>"
+        )
+        self._write_object(page_id, body.encode("ascii"))
+        self._page_ids.append(page_id)
+
+        self._content = None
+        self._page_images = {}
+
+    def close(self):
+        """Завершує документ: дерево сторінок, каталог, таблиця xref та трейлер"""
+        if self._file.closed:
+            return
+
+        self.end_page()
+
+        kids = " ".join(f"{page_id} 0 R" for page_id in self._page_ids)
+        pages = f"<< /Type /Pages /Kids [{kids}] /Count {len(self._page_ids)} >>"
+        self._write_object(PAGES_ID, pages.encode("ascii"))
+        self._write_object(CATALOG_ID, f"<< /Type /Catalog /Pages {PAGES_ID} 0 R >>".encode("ascii"))
+
+        xref_offset = self._file.tell()
+        size = self._next_id
+        if self._resume is None:
+            lines = [f"xref\n0 {size}\n", "0000000000 65535 f \n"]
+            for obj_id in range(1, size):
+                lines.append(f"{self._offsets.get(obj_id, 0):010d} 00000 n \n")
+            trailer = f"<< /Size {size} /Root {CATALOG_ID} 0 R >>"
+        else:
+            # Інкрементне оновлення: лише нові та змінені об'єкти, решта - через /Prev
+            # Голова списку вільних об'єктів: без неї деякі читачі вважають таблицю зсунутою
+            lines = ["xref\n0 1\n", "0000000000 65535 f \n"]
+            for start, ids in self._xref_sections():
+                lines.append(f"{start} {len(ids)}\n")
+                lines.extend(f"{self._offsets[obj_id]:010d} 00000 n \n" for obj_id in ids)
+            trailer = f"<< /Size {size} /Root {CATALOG_ID} 0 R /Prev {self._resume.startxref} >>"
+
+        self._file.write("".join(lines).encode("ascii"))
+        self._file.write(f"trailer\n{trailer}\nstartxref\n{xref_offset}\n%%EOF\n".encode("ascii"))
+        self._startxref = xref_offset
+        self._file_size = self._file.tell()
+        self._file.close()
+
+        if self._resume is None:
+            os.replace(self._path, self.output_path)
+
+    def _xref_sections(self) -> List[Tuple[int, List[int]]]:
+        """Групує номери записаних об'єктів у неперервні підрозділи таблиці xref"""
+        sections: List[Tuple[int, List[int]]] = []
+        for obj_id in sorted(self._offsets):
+            if sections and sections[-1][0] + len(sections[-1][1]) == obj_id:
+                sections[-1][1].append(obj_id)
+            else:
+                sections.append((obj_id, [obj_id]))
+        return sections
@@ -0,0 +1,125 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # pypdf потрібен лише для перевірки структури файлу
+    PdfReader = None
+
+from core.models.card import Card
+from core.services.export_service import ExportService
+from core.services.renderer_service import RendererService
+from infrastructure.renderer.card_renderer import CardRenderer
+from infrastructure.storage.pdf_exporter import PDFExporter
+
+# Низька роздільність, щоб тест рендерив швидко
+DPI = 60
+
+
+@unittest.skipIf(PdfReader is None, "pypdf не встановлено")
+class IncrementalPDFExportTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp(prefix="ls_pdf_test_")
+        self.output_path = os.path.join(self.workdir, "deck.pdf")
+        self.renderer_service = RendererService(CardRenderer(), output_dir=os.path.join(self.workdir, "render"))
+        self.pdf_exporter = PDFExporter(dpi=DPI, workers=1)
+        self.export_service = ExportService(self.pdf_exporter)
+
+        # Три сторінки, остання неповна
+        per_page = self.pdf_exporter.layout().cards_per_page
+        self.per_page = per_page
+        self.cards = [
+            Card(name=f"Картка {i}", type="tactic", cost=i % 5, cost_type="gold", description=f"Опис {i}")
+            for i in range(2 * per_page + 1)
+        ]
+        self.rendered = []
+
+    def tearDown(self):
+        self.pdf_exporter.close()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def _sources(self, fail_on=None):
+        """Джерела карток, що записують, які картки було відрендерено"""
+        sources = self.renderer_service.card_sources(self.cards, dpi=DPI)
+
+        def tracked(card, load):
+            def wrapper():
+                if card is fail_on:
+                    raise RuntimeError("рендер не вдався")
+                self.rendered.append(card.name)
+                return load()
+            return wrapper
+
+        return [(key, tracked(card, load)) for card, (key, load) in zip(self.cards, sources)]
+
+    def _read(self):
+        with open(self.output_path, 'rb') as f:
+            return f.read()
+
+    def _page_objects(self):
+        reader = PdfReader(self.output_path, strict=True)
+        return [page.indirect_reference.idnum for page in reader.pages]
+
+    def test_reexport_rewrites_only_changed_page(self):
+        self.export_service.export_incremental(self._sources(), self.output_path)
+        original = self._read()
+        original_pages = self._page_objects()
+        self.assertEqual(len(original_pages), 3)
+
+        self.rendered.clear()
+        edited = self.cards[self.per_page]
+        edited.description = "Змінений опис"
+        self.export_service.export_incremental(self._sources(), self.output_path)
+
+        # Рендериться лише сторінка зі зміненою карткою, а старі байти лишаються як є
+        self.assertEqual(self.rendered, [card.name for card in self.cards[self.per_page:2 * self.per_page]])
+        updated = self._read()
+        self.assertTrue(updated.startswith(original))
+        self.assertGreater(len(updated), len(original))
+
+        pages = self._page_objects()
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(pages[0], original_pages[0])
+        self.assertEqual(pages[2], original_pages[2])
+        self.assertNotEqual(pages[1], original_pages[1])
+
+        # Без змін файл не переписується взагалі
+        self.rendered.clear()
+        self.export_service.export_incremental(self._sources(), self.output_path)
+        self.assertEqual(self.rendered, [])
+        self.assertEqual(self._read(), updated)
+
+    def test_failed_update_keeps_previous_pdf(self):
+        self.export_service.export_incremental(self._sources(), self.output_path)
+        original = self._read()
+        with open(f"{self.output_path}.manifest.json", 'rb') as f:
+            manifest = f.read()
+
+        edited = self.cards[0]
+        edited.description = "Змінений опис"
+        with self.assertRaises(RuntimeError):
+            self.export_service.export_incremental(self._sources(fail_on=edited), self.output_path)
+
+        self.assertEqual(self._read(), original)
+        with open(f"{self.output_path}.manifest.json", 'rb') as f:
+            self.assertEqual(f.read(), manifest)
+        self.assertEqual(len(self._page_objects()), 3)
+
+        # Наступний експорт продовжує з попереднього файлу
+        self.export_service.export_incremental(self._sources(), self.output_path)
+        self.assertTrue(self._read().startswith(original))
+        self.assertEqual(len(self._page_objects()), 3)
+
+    def test_failed_first_export_leaves_no_file(self):
+        with self.assertRaises(RuntimeError):
+            self.export_service.export_incremental(self._sources(fail_on=self.cards[-1]), self.output_path)
+
+        self.assertFalse(os.path.exists(self.output_path))
+        self.assertFalse(os.path.exists(f"{self.output_path}.tmp"))
+        self.assertFalse(os.path.exists(f"{self.output_path}.manifest.json"))
+
+
+if __name__ == "__main__":
+    unittest.main()
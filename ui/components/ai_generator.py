@@ -1,45 +1,109 @@
 
+import random
 import threading
-from typing import List, Optional
-from PySide6.QtCore import Signal, QObject, QThread, Qt
-from PySide6.QtWidgets import (QWidget, QVBoxLayout, QTextEdit, QPushButton, 
-                             QLabel, QLineEdit, QComboBox, QMessageBox)
-from PySide6.QtGui import QPixmap
+from typing import List, Optional, Tuple
+from PySide6.QtCore import Signal, QObject, QThread, Qt, QSize
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTextEdit, QPushButton,
+                             QLabel, QLineEdit, QComboBox, QMessageBox, QListWidget, QListWidgetItem)
+from PySide6.QtGui import QIcon, QPixmap
 from core.models.card import Card
 from core.services.ai_service import AIService
+from infrastructure.ai.cpu_profile import CPUProfile
 from infrastructure.ai.image_generator import ImageGenerator
+from infrastructure.ai.job_queue import GenerationQueue
 from infrastructure.ai.model_loader import ModelLoader
+from infrastructure.ai.pipeline_cache import PipelineCache
+from infrastructure.ai.prompt_cache import PromptEmbeddingCache
+from infrastructure.ai.result_store import ResultStore
 from app.state import app_state
+from app.config import config
 
 class AIWorker(QObject):
     finished = Signal(list)
     progress = Signal(int)
     error = Signal(str)
 
-    def __init__(self, ai_service: AIService, card: Card, count: int):
+    def __init__(self, ai_service: AIService, card: Card, count: int, seed: Optional[int] = None):
         super().__init__()
         self.ai_service = ai_service
         self.card = card
         self.count = count
+        self.seed = seed
         self.abort_event = threading.Event()
 
     def run(self):
         try:
-            images = []
-            for i in range(self.count):
-                if self.abort_event.is_set():
-                    break
+            # Усі варіанти генеруються пакетами в одному виклику
+            images = self.ai_service.generate_card_image(
+                self.card,
+                self.count,
+                self.abort_event.is_set,
+                lambda done, total: self.progress.emit(done),
+                seed=self.seed,
+            )
 
-                # Генерація одного зображення
-                image_paths = self.ai_service.generate_card_image(
-                    self.card, 1, self.abort_event.is_set
-                )
+            self.finished.emit(images)
+        except Exception as e:
+            self.error.emit(str(e))
 
-                if image_paths:
-                    images.extend(image_paths)
-                    self.progress.emit(i + 1)
+    def abort(self):
+        self.abort_event.set()
 
-            self.finished.emit(images)
+class DraftWorker(QObject):
+    finished = Signal(list)
+    error = Signal(str)
+
+    def __init__(
+        self,
+        ai_service: AIService,
+        card: Optional[Card] = None,
+        count: int = 0,
+        drafts: Optional[list] = None,
+        seed: Optional[int] = None,
+    ):
+        super().__init__()
+        self.ai_service = ai_service
+        self.card = card
+        self.count = count
+        self.drafts = drafts
+        self.seed = seed
+        self.abort_event = threading.Event()
+
+    def run(self):
+        try:
+            if self.drafts:
+                # Доопрацювання вибраних чернеток до повного розміру
+                result = self.ai_service.refine_drafts(self.drafts, self.abort_event.is_set)
+            else:
+                result = self.ai_service.generate_card_drafts(self.card, self.count, self.abort_event.is_set, seed=self.seed)
+            self.finished.emit(result)
+        except Exception as e:
+            self.error.emit(str(e))
+
+    def abort(self):
+        self.abort_event.set()
+
+class QueueWorker(QObject):
+    finished = Signal(int)
+    job_finished = Signal(str, str)
+    error = Signal(str)
+
+    def __init__(self, ai_service: AIService, queue: GenerationQueue, cards: List[Card]):
+        super().__init__()
+        self.ai_service = ai_service
+        self.queue = queue
+        self.cards = cards
+        self.abort_event = threading.Event()
+
+    def run(self):
+        try:
+            completed = self.ai_service.run_queue(
+                self.queue,
+                self.cards,
+                self.abort_event.is_set,
+                lambda job, card: self.job_finished.emit(job.card_name, job.image_paths[0]),
+            )
+            self.finished.emit(completed)
         except Exception as e:
             self.error.emit(str(e))
 
@@ -48,6 +112,7 @@ class AIWorker(QObject):
 
 class AIGeneratorWidget(QWidget):
     image_generated = Signal(list)
+    load_status_changed = Signal(dict)
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -59,8 +124,16 @@ class AIGeneratorWidget(QWidget):
                 "name": "Назва картки:",
                 "type": "Тип:",
                 "count": "Кількість:",
+                "seed": "Сід (порожньо - за промптом):",
+                "new_seed": "Новий сід",
                 "model": "Модель:",
+                "model_status": "Стан моделі: {state} ({progress}%)",
                 "generate": "Згенерувати",
+                "generate_deck": "Згенерувати для колоди",
+                "drafts": "Чернетки",
+                "refine": "Доопрацювати вибрані",
+                "no_drafts_selected": "Не вибрано жодної чернетки",
+                "queue_msg": "Згенеровано ілюстрації для {count} карток",
                 "abort": "Перервати",
                 "preview": "Попередній перегляд:",
                 "no_image": "Немає зображення",
@@ -75,8 +148,16 @@ class AIGeneratorWidget(QWidget):
                 "name": "Card name:",
                 "type": "Type:",
                 "count": "Count:",
+                "seed": "Seed (empty - from prompt):",
+                "new_seed": "New seed",
                 "model": "Model:",
+                "model_status": "Model status: {state} ({progress}%)",
                 "generate": "Generate",
+                "generate_deck": "Generate for deck",
+                "drafts": "Drafts",
+                "refine": "Refine selected",
+                "no_drafts_selected": "No drafts selected",
+                "queue_msg": "Generated artwork for {count} cards",
                 "abort": "Abort",
                 "preview": "Preview:",
                 "no_image": "No image",
@@ -110,16 +191,52 @@ class AIGeneratorWidget(QWidget):
         layout.addWidget(QLabel(self.strings[self.language]["count"]))
         layout.addWidget(self.count_edit)
 
+        # Сід: однаковий сід з тими самими параметрами дає те саме зображення
+        # Новий сід дає інший набір варіантів чи чернеток для того самого промпту
+        seed_layout = QHBoxLayout()
+        self.seed_edit = QLineEdit()
+        seed_layout.addWidget(self.seed_edit)
+        self.new_seed_button = QPushButton(self.strings[self.language]["new_seed"])
+        self.new_seed_button.clicked.connect(self.new_seed)
+        seed_layout.addWidget(self.new_seed_button)
+        layout.addWidget(QLabel(self.strings[self.language]["seed"]))
+        layout.addLayout(seed_layout)
+
         # Модель
         self.model_combo = QComboBox()
         layout.addWidget(QLabel(self.strings[self.language]["model"]))
         layout.addWidget(self.model_combo)
 
+        self.model_status_label = QLabel("")
+        layout.addWidget(self.model_status_label)
+
         # Кнопки
         self.generate_button = QPushButton(self.strings[self.language]["generate"])
         self.generate_button.clicked.connect(self.generate_images)
         layout.addWidget(self.generate_button)
 
+        self.generate_deck_button = QPushButton(self.strings[self.language]["generate_deck"])
+        self.generate_deck_button.clicked.connect(self.generate_deck)
+        layout.addWidget(self.generate_deck_button)
+
+        # Чернетки: багато дешевих попередніх переглядів, доопрацьовуються лише вибрані
+        drafts_layout = QHBoxLayout()
+        self.drafts_button = QPushButton(self.strings[self.language]["drafts"])
+        self.drafts_button.clicked.connect(self.generate_drafts)
+        drafts_layout.addWidget(self.drafts_button)
+
+        self.refine_button = QPushButton(self.strings[self.language]["refine"])
+        self.refine_button.clicked.connect(self.refine_drafts)
+        drafts_layout.addWidget(self.refine_button)
+        layout.addLayout(drafts_layout)
+
+        self.drafts_list = QListWidget()
+        self.drafts_list.setViewMode(QListWidget.IconMode)
+        self.drafts_list.setIconSize(QSize(96, 150))
+        self.drafts_list.setSelectionMode(QListWidget.MultiSelection)
+        layout.addWidget(self.drafts_list)
+        self.drafts = []
+
         self.abort_button = QPushButton(self.strings[self.language]["abort"])
         self.abort_button.clicked.connect(self.abort_generation)
         self.abort_button.setEnabled(False)
@@ -138,13 +255,48 @@ class AIGeneratorWidget(QWidget):
     def setup_services(self):
         # Ініціалізація сервісів
         model_loader = ModelLoader()
-        self.ai_service = AIService(ImageGenerator())
+        self.model_loader = model_loader
+        budget_mb = config.get("ai.pipeline_memory_budget_mb")
+        results_max_mb = config.get("ai.results_max_mb", 2048)
+        pipeline_cache = PipelineCache(
+            max_pipelines=config.get("ai.pipeline_cache_size", 2),
+            max_bytes=budget_mb * 1024 * 1024 if budget_mb else None,
+        )
+        self.ai_service = AIService(ImageGenerator(
+            batch_size=config.get("ai.batch_size", 4),
+            pipeline_cache=pipeline_cache,
+            prompt_cache=PromptEmbeddingCache(config.get("ai.prompt_cache_size", 64)),
+            cpu_profile=CPUProfile.from_config(config.get("ai.cpu")),
+            draft_scale=config.get("ai.draft_scale", 0.5),
+            draft_steps=config.get("ai.draft_steps", 8),
+            refine_strength=config.get("ai.refine_strength", 0.5),
+            result_store=ResultStore(
+                config.get("ai.results_dir", "export/ai_results"),
+                max_bytes=results_max_mb * 1024 * 1024 if results_max_mb else None,
+            ),
+        ))
 
         # Заповнення списку моделей
         models = model_loader.get_available_models()
         for model_name in models.keys():
             self.model_combo.addItem(model_name)
 
+        default_model = config.get("ai.default_model")
+        if default_model in models:
+            self.model_combo.setCurrentText(default_model)
+
+        # Стан завантаження надходить з фонового потоку, тому передається через сигнал
+        self.load_status_changed.connect(self.on_load_status)
+        self.ai_service.image_generator.add_load_listener(self.load_status_changed.emit)
+
+        # Модель завантажується у фоні одразу, а не під час першої генерації
+        if models and config.get("ai.preload", True):
+            if self.apply_selected_model():
+                self.ai_service.image_generator.preload()
+
+        # Постійна черга генерації для колоди
+        self.queue = GenerationQueue()
+
         # Поточний потік
         self.worker = None
         self.worker_thread = None
@@ -161,6 +313,10 @@ class AIGeneratorWidget(QWidget):
                           "Кількість має бути числом")
             return
 
+        valid, seed = self.read_seed()
+        if not valid:
+            return
+
         # Створення картки
         card = Card(
             name=name,
@@ -169,13 +325,15 @@ class AIGeneratorWidget(QWidget):
             cost_type="BF"
         )
 
+        if not self.apply_selected_model():
+            return
+
         # Налаштування UI
-        self.generate_button.setEnabled(False)
-        self.abort_button.setEnabled(True)
+        self.set_running(True)
 
         # Створення та запуск потоку
         self.worker_thread = QThread()
-        self.worker = AIWorker(self.ai_service, card, count)
+        self.worker = AIWorker(self.ai_service, card, count, seed)
         self.worker.moveToThread(self.worker_thread)
 
         self.worker_thread.started.connect(self.worker.run)
@@ -189,14 +347,159 @@ class AIGeneratorWidget(QWidget):
 
         self.worker_thread.start()
 
+    def apply_selected_model(self) -> bool:
+        # Вибір моделі: раніше завантажені моделі беруться з кешу пайплайнів
+        model_name = self.model_combo.currentText()
+        if model_name:
+            try:
+                _, model_path = self.model_loader.get_model_path(model_name)
+                self.ai_service.image_generator.set_model(model_path)
+            except ValueError as e:
+                QMessageBox.warning(self, self.strings[self.language]["error"], str(e))
+                return False
+        return True
+
+    def set_running(self, running: bool):
+        self.generate_button.setEnabled(not running)
+        self.generate_deck_button.setEnabled(not running)
+        self.drafts_button.setEnabled(not running)
+        self.refine_button.setEnabled(not running)
+        self.abort_button.setEnabled(running)
+
+    def start_worker(self, worker: QObject, on_finished):
+        self.set_running(True)
+
+        self.worker_thread = QThread()
+        self.worker = worker
+        self.worker.moveToThread(self.worker_thread)
+
+        self.worker_thread.started.connect(self.worker.run)
+        self.worker.finished.connect(on_finished)
+        self.worker.error.connect(self.on_error)
+        self.worker.finished.connect(self.worker_thread.quit)
+        self.worker.error.connect(self.worker_thread.quit)
+        self.worker_thread.finished.connect(self.worker.deleteLater)
+        self.worker_thread.finished.connect(self.worker_thread.deleteLater)
+
+        self.worker_thread.start()
+
+    def new_seed(self):
+        self.seed_edit.setText(str(random.randrange(2 ** 32)))
+
+    def read_seed(self) -> Tuple[bool, Optional[int]]:
+        """Читає сід з поля: (чи коректний, сід або None, якщо поле порожнє)"""
+        seed_text = self.seed_edit.text().strip()
+        try:
+            return True, int(seed_text) if seed_text else None
+        except ValueError:
+            QMessageBox.warning(self, self.strings[self.language]["error"],
+                          "Сід має бути числом")
+            return False, None
+
+    def generate_drafts(self):
+        try:
+            count = int(self.count_edit.text())
+        except ValueError:
+            QMessageBox.warning(self, self.strings[self.language]["error"],
+                          "Кількість має бути числом")
+            return
+
+        valid, seed = self.read_seed()
+        if not valid:
+            return
+
+        card = Card(
+            name=self.name_edit.text(),
+            type=self.type_combo.currentText(),
+            cost=1,
+            cost_type="BF"
+        )
+
+        if not self.apply_selected_model():
+            return
+
+        self.start_worker(DraftWorker(self.ai_service, card, count, seed=seed), self.on_drafts_ready)
+
+    def on_drafts_ready(self, drafts: list):
+        self.set_running(False)
+
+        self.drafts = drafts
+        self.drafts_list.clear()
+        for draft in drafts:
+            item = QListWidgetItem(QIcon(draft.path), str(draft.seed))
+            self.drafts_list.addItem(item)
+
+        self.worker = None
+        self.worker_thread = None
+
+    def refine_drafts(self):
+        selected = [self.drafts[self.drafts_list.row(item)] for item in self.drafts_list.selectedItems()]
+        if not selected:
+            QMessageBox.warning(
+                self,
+                self.strings[self.language]["error"],
+                self.strings[self.language]["no_drafts_selected"]
+            )
+            return
+
+        if not self.apply_selected_model():
+            return
+
+        self.start_worker(DraftWorker(self.ai_service, drafts=selected), self.on_generation_finished)
+
+    def generate_deck(self):
+        # Картки без ілюстрацій додаються до черги; незавершені завдання з минулого запуску продовжуються
+        cards = list(app_state.current_deck)
+        self.queue.apply_results(cards)
+        self.queue.enqueue(cards)
+
+        if not self.apply_selected_model():
+            return
+
+        self.set_running(True)
+
+        self.worker_thread = QThread()
+        self.worker = QueueWorker(self.ai_service, self.queue, cards)
+        self.worker.moveToThread(self.worker_thread)
+
+        self.worker_thread.started.connect(self.worker.run)
+        self.worker.finished.connect(self.on_queue_finished)
+        self.worker.job_finished.connect(self.on_job_finished)
+        self.worker.error.connect(self.on_error)
+        self.worker.finished.connect(self.worker_thread.quit)
+        self.worker.error.connect(self.worker_thread.quit)
+        self.worker_thread.finished.connect(self.worker.deleteLater)
+        self.worker_thread.finished.connect(self.worker_thread.deleteLater)
+
+        self.worker_thread.start()
+
+    def on_job_finished(self, card_name: str, image_path: str):
+        # Картки колоди змінюються лише в потоці інтерфейсу; зображення отримують усі копії картки
+        self.queue.apply_results(app_state.current_deck)
+        app_state.add_generated_image(image_path)
+        pixmap = QPixmap(image_path)
+        self.preview_image.setPixmap(pixmap.scaled(256, 256, Qt.KeepAspectRatio))
+
+    def on_queue_finished(self, completed: int):
+        self.set_running(False)
+
+        QMessageBox.information(
+            self,
+            self.strings[self.language]["success"],
+            self.strings[self.language]["queue_msg"].format(count=completed)
+        )
+
+        # Очищення потоку
+        self.worker = None
+        self.worker_thread = None
+
     def abort_generation(self):
         if self.worker:
             self.worker.abort()
 
     def on_generation_finished(self, image_paths: List[str]):
         # Оновлення UI
-        self.generate_button.setEnabled(True)
-        self.abort_button.setEnabled(False)
+        self.set_running(False)
 
         # Збереження зображень у стані
         for path in image_paths:
@@ -221,14 +524,22 @@ class AIGeneratorWidget(QWidget):
         self.worker = None
         self.worker_thread = None
 
+    def on_load_status(self, status: dict):
+        self.model_status_label.setText(
+            self.strings[self.language]["model_status"].format(
+                state=status["state"], progress=int(status["progress"] * 100)
+            )
+        )
+        if status.get("error"):
+            self.model_status_label.setToolTip(status["error"])
+
     def on_progress(self, current: int):
         # Можна додати індикатор прогресу
         pass
 
     def on_error(self, error_msg: str):
         # Оновлення UI
-        self.generate_button.setEnabled(True)
-        self.abort_button.setEnabled(False)
+        self.set_running(False)
 
         # Повідомлення про помилку
         QMessageBox.critical(
@@ -54,7 +54,17 @@ class ExportWidget(QWidget):
 
         # Ініціалізація сервісів
         self.renderer_service = RendererService(CardRenderer())
-        self.export_service = ExportService(PDFExporter())
+        self.export_service = ExportService(PDFExporter(
+            dpi=config.get("renderer.default_dpi"),
+            image_format=config.get("renderer.pdf_image_format", "flate"),
+            jpeg_quality=config.get("renderer.pdf_jpeg_quality", 90),
+            compress_level=config.get("renderer.pdf_compress_level", 6),
+            workers=config.get("renderer.pdf_workers"),
+            bleed=config.get("renderer.pdf_bleed", 0),
+            gutter=config.get("renderer.pdf_gutter", 0),
+            crop_marks=config.get("renderer.pdf_crop_marks", False),
+            duplex=config.get("renderer.pdf_duplex", "long"),
+        ))
 
         self.setup_ui()
         self.update_cards()
@@ -165,7 +175,7 @@ class ExportWidget(QWidget):
 
             for card in selected_cards:
                 # Рендеринг картки
-                rendered_path = self.renderer_service.render_card(card)
+                rendered_path = self.renderer_service.render_card(card, language=self.language)
 
                 # Переміщення до вибраної папки
                 file_name = os.path.basename(rendered_path)
@@ -227,16 +237,13 @@ class ExportWidget(QWidget):
         if not file_path:
             return
 
-        # Рендеринг карток
+        # Рендеринг у пам'яті лише змінених карток та оновлення відповідних сторінок PDF
         try:
-            rendered_paths = []
-
-            for card in selected_cards:
-                rendered_path = self.renderer_service.render_card(card)
-                rendered_paths.append(rendered_path)
-
-            # Експорт у PDF
-            pdf_path = self.export_service.export_deck_to_pdf(rendered_paths, file_path)
+            # Картки рендеряться одразу в роздільності друку, а не масштабуються при вбудовуванні
+            sources = self.renderer_service.card_sources(
+                selected_cards, language=self.language, dpi=self.export_service.pdf_exporter.dpi
+            )
+            pdf_path = self.export_service.export_incremental(sources, file_path)
 
             # Повідомлення про успішний експорт
             QMessageBox.information(